@@ -5,10 +5,12 @@ Implements a command line interface (CLI) that accesses the functionality of the
 """
 
 if __name__ == "__main__":
-    from . import ifsqsar
-    from . import models
+    # openbabel, numpy and the models are only imported once the arguments show they are needed
+    from . import profiling
     import argparse
+    import atexit
     import os
+    import sys
 
     thispath = os.path.dirname(os.path.abspath(__file__))
     # define options for commandline interface
@@ -153,17 +155,86 @@ if __name__ == "__main__":
                            help='Comma-separated list of values to return. Full list: '
                                  'insmi, normsmi, sminote, eendpoint, units, qsarpred, UL, ULnote, error, citation. See full docs for explanation'
                            )
+    # persistent fragment count cache
+    argparser.add_argument('-k',
+                           '--countcache',
+                           metavar='countcache',
+                           action='store',
+                           type=str,
+                           help='Directory of a fragment count cache that is reused by later runs, '
+                                'default = no cache')
+    # size of the in-memory cache of predictions
+    argparser.add_argument('-l',
+                           '--predictioncache',
+                           metavar='predictioncache',
+                           action='store',
+                           type=int,
+                           default=65536,
+                           help='Maximum number of calculated predictions kept in memory and reused for repeated '
+                                'chemicals, 0 turns the cache off, default = 65536')
+    # build binary artifacts and the bundle of derived model state
+    argparser.add_argument('-b',
+                           '--buildcache',
+                           metavar='buildcache',
+                           action='store',
+                           type=str,
+                           nargs='?',
+                           const='',
+                           help='Build the model artifacts and model bundle in a directory then exit, '
+                                'default = the models/artifacts directory')
+    # load the models before any input is processed
+    argparser.add_argument('-w',
+                           '--warmup',
+                           action='store_true',
+                           help='Load the selected QSARs and their dependencies before processing input and '
+                                'print the load time and memory of each model to standard error')
+    argparser.add_argument('-j',
+                           '--workers',
+                           metavar='workers',
+                           action='store',
+                           type=int,
+                           default=1,
+                           help='Number of parallel workers used to load models with --warmup, default = 1')
+    # start up timing report
+    argparser.add_argument('-g',
+                           '--startupprofile',
+                           '--startup-profile',
+                           metavar='startupprofile',
+                           action='store',
+                           type=str,
+                           help='Path and name of a JSON file to write the time spent in each phase of start up to '
+                                'when ifsqsar exits')
     # parse the options passed then decide actions
     args = argparser.parse_args()
+    if args.startupprofile is not None:
+        atexit.register(profiling.write_startup_report, args.startupprofile)
     # no input specified, start the GUI
     if args.docs:
         with open(os.path.join(thispath, 'README.md'), 'r') as readmefile:
             infostring = readmefile.read()
         infostring = infostring.replace('<pre>', '').replace('</pre>', '').replace('\[', '[')
         print(infostring)
-    elif args.infile is None and args.smiles is None:
+    elif args.buildcache is not None:
+        with profiling.import_phase('ifsqsar.models'):
+            from . import models
+        if args.buildcache != '':
+            models.set_artifact_directory(args.buildcache)
+        built = models.build_model_artifacts()
+        contenthash = models.build_model_bundle()
+        print('built artifacts of {} models, model bundle content hash {}'.format(len(built), contenthash))
+    elif args.infile is None and args.smiles is None and not args.warmup:
+        with profiling.import_phase('ifsqsar.ifsqsar'):
+            from . import ifsqsar
         ifsqsar.main()
     else:
+        with profiling.import_phase('ifsqsar.ifsqsar'):
+            from . import ifsqsar
+        with profiling.import_phase('ifsqsar.models'):
+            from . import models
+        # use persistent fragment count cache
+        if args.countcache is not None:
+            models.set_fragment_count_cache(args.countcache)
+        models.set_prediction_cache_size(args.predictioncache)
         # load QSARs
         if args.qsars == '':
             qsarmodels = []
@@ -190,6 +261,14 @@ if __name__ == "__main__":
             qsarmodels = models.get_qsar_list(qsarlist=['logKsa'])
         else:
             qsarmodels = models.get_qsar_list(qsarlist=args.qsars.split(','))
+        # load models and report
+        if args.warmup:
+            for entry in models.warmup(qsarmodels, workers=args.workers):
+                print('{}\t{}\t{:.3f} s\t{} bytes'.format(entry['name'], entry['module'], entry['seconds'], entry['nbytes']),
+                      file=sys.stderr)
+            # nothing else to do without input
+            if args.infile is None and args.smiles is None:
+                sys.exit()
         # choose values
         values = []
         if args.values != '':
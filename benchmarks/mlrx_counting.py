@@ -0,0 +1,70 @@
+"""
+ifsqsar/benchmarks/mlrx_counting.py
+Micro-benchmark of non-overlapping (MLRX) fragment counting with atom sets and with the atom bitmasks
+of QSARModel.get_fragment_counts, using the training set SMILES embedded in the model modules
+
+usage: python -m ifsqsar.benchmarks.mlrx_counting [repeats]
+"""
+
+import sys
+import time
+import importlib
+import numpy as np
+from ifsqsar import smiles_norm
+from ifsqsar import models
+
+
+def fragment_counts_with_sets(qsar, molecule):
+    """MLRX fragment counts of QSARModel.get_fragment_counts as they were counted before, with a set of matched atoms"""
+    explicith = qsar.model_namespace.molecule_format == 'old_format'
+    view = molecule.get_hydrogen_view(explicith)
+    matchedatoms = set()
+    fragment_counts = []
+    for smarts in qsar.model_namespace.smartslist:
+        if smarts == 'intercept':
+            fragment_counts.append(1)
+        elif smarts == 'sssr':
+            fragment_counts.append(len(view.GetSSSR()))
+        elif smarts == 'MW':
+            fragment_counts.append(view.GetMolWt())
+        else:
+            matchcount = 0
+            for match in models._match_smarts(smarts, molecule, explicith):
+                if len(set(match).intersection(matchedatoms)) == 0:
+                    matchcount += 1
+                    matchedatoms.update(set(match))
+            fragment_counts.append(matchcount)
+    return np.array(fragment_counts)
+
+
+def main(repeats=5):
+    # training set SMILES of the fragment QSARs that store them
+    smileslist = []
+    for module in ('ifs_qsar_fhlb_linr', 'ifs_qsar_hhlb_linr', 'ifs_qsar_hhlt_linr', 'ifs_qsar_tm_linr', 'ifs_qsar_dsm_linr'):
+        namespace = importlib.import_module('ifsqsar.models.' + module)
+        smileslist.extend(smiles.decode('utf-8') for smiles in namespace.datalist['smiles'])
+    molecules = []
+    for smiles in sorted(set(smileslist)):
+        molecule, normsmiles, note = smiles_norm.convertsmiles(smiles)
+        if normsmiles != '':
+            molecules.append(molecule)
+    polyhalogenated = [m for m in molecules if sum(m.get_composition(False)[0].get(z, 0) for z in (9, 17, 35, 53)) >= 6]
+    for qsar in (models.MVmlrx, models.biowin3usmmlrx, models.biowin4psmmlrx):
+        qsar.load()
+        for label, subset in (('all', molecules), ('polyhalogenated', polyhalogenated)):
+            # count once so that the molecules remember the matches of all patterns and only the counting is timed
+            for m in subset:
+                assert (qsar.get_fragment_counts(m) == fragment_counts_with_sets(qsar, m)).all()
+            timings = []
+            for count in (fragment_counts_with_sets, type(qsar).get_fragment_counts):
+                start = time.perf_counter()
+                for r in range(repeats):
+                    for m in subset:
+                        count(qsar, m)
+                timings.append((time.perf_counter() - start) / repeats / max(len(subset), 1) * 1e6)
+            print('{:16} {:16} {:5d} chemicals  sets {:8.1f} us  bitmask {:8.1f} us  speedup {:.2f}x'.format(
+                qsar.model_name, label, len(subset), timings[0], timings[1], timings[0] / timings[1]))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,47 @@
+"""
+ifsqsar/context.py
+developed by Trevor N. Brown
+Implements the evaluation context that holds the state of applying QSARs that cannot be shared between threads
+"""
+
+from . import profiling
+with profiling.import_phase('openbabel'):
+    from openbabel import openbabel as ob
+import threading
+
+
+class EvaluationContext:
+    """State of applying QSARs in one thread.
+
+    An OBSmartsPattern keeps the results of its last match inside the pattern, so the patterns shared by
+    smiles_norm and the loaded models can only be matched by one thread at a time. The main thread
+    matches the shared patterns, every other thread matches its own copies, which are made the first
+    time the thread matches each pattern. Everything else (the model arrays) is shared by all threads.
+    """
+
+    def __init__(self, shared=False):
+        """Create an empty context, shared means that the shared patterns are matched without copies"""
+        self.shared = shared
+        # copies of the shared patterns, keyed by the shared pattern
+        self.patterns = {}
+
+    def match(self, pattern, molecule):
+        """Match a shared OBSmartsPattern (or the copy of this context) in a molecule and return the unique matches"""
+        if not self.shared:
+            if pattern not in self.patterns:
+                self.patterns[pattern] = ob.OBSmartsPattern(pattern)
+            pattern = self.patterns[pattern]
+        pattern.Match(molecule)
+        # GetUMapList is a view of the matches inside the pattern that the next Match overwrites, so copy it
+        return tuple(tuple(match) for match in pattern.GetUMapList())
+
+
+# the evaluation context of each thread, see get_context
+_contexts = threading.local()
+
+
+def get_context():
+    """Return the evaluation context of the current thread, it is created the first time it is needed"""
+    if not hasattr(_contexts, 'context'):
+        _contexts.context = EvaluationContext(shared=threading.current_thread() is threading.main_thread())
+    return _contexts.context
@@ -5,10 +5,14 @@ Implements a python API for applying IFS QSARs and a simple GUI that built on to
 The primary elements of the API are the functions apply_qsars_to_molecule and apply_qsars_to_molecule_list
 """
 
-from openbabel import openbabel as ob
-import numpy as np
+from . import profiling
+with profiling.import_phase('openbabel'):
+    from openbabel import openbabel as ob
+with profiling.import_phase('numpy'):
+    import numpy as np
 from . import smiles_norm
 import re
+import threading
 
 chargedatom = re.compile('[\[].+?[-+][\]]')
 mixturespec = re.compile('(\{.*?\})')
@@ -53,6 +57,7 @@ def apply_qsars_to_molecule(qsarlist,
             "error" -- estimated prediction uncertainty
             "ULnote" -- applicability domain warnings
             "citation" -- literature to cite for the predicted value
+            the applicability domain checks are skipped if none of UL, error or ULnote are included
         outformat -- "rows" (default) or "columns" for formatted text output, or "dict" for a dict
         header -- include header line in formatted text output, default=True
         separator -- column separator for formatted text output, default="\\t" (tab)
@@ -241,10 +246,13 @@ def apply_qsars_to_molecule(qsarlist,
             qsarpredmixcolumns.append('qsarpred component {}'.format(mc+1))
             ULmixcolumns.append('UL component {}'.format(mc+1))
             errormixcolumns.append('error component {}'.format(mc+1))
-    # parse through the list of QSARs applying each to the molecule
+    # apply the QSARs and their dependencies once each in dependency order
+    from . import models
+    plan = models.get_evaluation_plan(qsarlist)
+    if result['SMILES success']:
+        planresults = plan.apply(solutes=solutelist, solvents=solventlist, components=componentlist, solutef=solutef, solventf=solventf, componentf=componentf, values=values)
+    # parse through the list of QSARs storing the output of each
     for qsar in qsarlist:
-        # load the model
-        qsar.load()
         # initialize dict of calculated results
         result['QSAR list'].append(qsar.model_name)
         result[qsar.model_name] = {}
@@ -278,7 +286,7 @@ def apply_qsars_to_molecule(qsarlist,
         if not result['SMILES success']:
             continue
         # apply model and store output
-        qsar_prediction, uncertainty_level, error, note, citation, units, endpoint = qsar.apply_model(solutes=solutelist, solvents=solventlist, components=componentlist, solutef=solutef, solventf=solventf, componentf=componentf)
+        qsar_prediction, uncertainty_level, error, note, citation, units, endpoint = planresults[qsar]
         if 'endpoint' in values:
             result[qsar.model_name]['endpoint'] = endpoint
         if 'units' in values:
@@ -826,16 +834,33 @@ class IFSGUIClass:
     def __init__(self):
         """GUI enters single mode by default. Available QSARs are loaded."""
         # initiate root
-        self.root = self.tk.Tk()
-        self.root.wm_title('IFSQSAR')
-        self.filedialog = __import__('tkinter.filedialog', fromlist=[''])
-        # create frame
-        self.frame = self.tk.Frame(self.root)
-        self.frame.pack_propagate(0)
-        self.frame.pack()
-        # initiate mode variable and import models
-        self.mixturemode = self.tk.StringVar()
-        self.mixturemode.set('purechemical')
+        with profiling.phase('gui initialization', 'tk'):
+            self.root = self.tk.Tk()
+            self.root.wm_title('IFSQSAR')
+            self.filedialog = __import__('tkinter.filedialog', fromlist=[''])
+            # create frame
+            self.frame = self.tk.Frame(self.root)
+            self.frame.pack_propagate(0)
+            self.frame.pack()
+            # initiate mode variable
+            self.mixturemode = self.tk.StringVar()
+            self.mixturemode.set('purechemical')
+            # setup openbabel converter
+            self.obcon = ob.OBConversion()
+            self.obcon.SetInAndOutFormats('smi', 'can')
+            # set to single mode
+            self.setup_single_mode()
+        # import and load models in the background so the window is shown right away,
+        # calculations wait until loading has finished
+        self.loader = threading.Thread(target=self.load_models, daemon=True)
+        self.loader.start()
+        self.root.wm_title('IFSQSAR (loading models)')
+        self.root.after(200, self.check_models_loaded)
+        # start up gui
+        self.root.mainloop()
+
+    def load_models(self):
+        """Import and load the QSARs, run in a background thread without touching any widgets."""
         from . import models
         self.pure_qsarmodels = models.get_qsar_list(qsarlist=['fhlb', 'hhlb', 'hhlt', 'HLbiodeg',
                                                               'dsm', 'tmconsensus', 'tbpplfer',
@@ -846,13 +871,14 @@ class IFSGUIClass:
                                                               'E', 'S', 'A', 'B', 'V', 'L',
                                                               's', 'a', 'b', 'v', 'l', 'c'])
         self.mixture_qsarmodels = models.get_qsar_list(qsarlist=['logKsa'])
-        # setup openbabel converter
-        self.obcon = ob.OBConversion()
-        self.obcon.SetInAndOutFormats('smi', 'can')
-        # set to single mode
-        self.setup_single_mode()
-        # start up gui
-        self.root.mainloop()
+        models.warmup(self.pure_qsarmodels + self.mixture_qsarmodels)
+
+    def check_models_loaded(self):
+        """Reset the window title once the models are loaded, otherwise check again later."""
+        if self.loader.is_alive():
+            self.root.after(200, self.check_models_loaded)
+        else:
+            self.root.wm_title('IFSQSAR')
 
     def setup_single_mode(self):
         """Delete any batch mode widgets present and load single mode widgets."""
@@ -1071,6 +1097,7 @@ class IFSGUIClass:
         # get smiles from the gui, apply models and write results to gui
         smiles = self.entrysmiles.get()
         self.toggle_disabled(self.tk.DISABLED)
+        self.loader.join()
         if self.mixturemode.get() == 'purechemical':
             localqsarlist = self.pure_qsarmodels
         elif self.mixturemode.get() == 'mixture':
@@ -1110,6 +1137,7 @@ class IFSGUIClass:
         else:
             print('file type not recognized: ', outextension)
             return
+        self.loader.join()
         if self.mixturemode.get() == 'purechemical':
             localqsarlist = self.pure_qsarmodels
         elif self.mixturemode.get() == 'mixture':
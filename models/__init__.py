@@ -4,9 +4,31 @@ developed by Trevor N. Brown
 Stores all data and model-specific code for QSARs as python modules and implements a generic API for accessing them
 """
 
-from openbabel import openbabel as ob
-import numpy as np
+from .. import profiling
+with profiling.import_phase('openbabel'):
+    from openbabel import openbabel as ob
+with profiling.import_phase('numpy'):
+    import numpy as np
 import importlib
+import importlib.util
+import importlib.machinery
+import collections
+import copy
+import atexit
+import os
+import sys
+import ast
+import json
+import hashlib
+import marshal
+import sqlite3
+import time
+import threading
+import warnings
+import concurrent.futures
+from .. import smiles_norm
+from .. import context
+from . import batch
 
 
 def _normcdfapprox(x):
@@ -57,6 +79,655 @@ def _calculate_fragment_similarity(counts_array_i, counts_array_j, stdev_array,
     return tanimoto
 
 
+class _SparseCounts:
+    """Compressed sparse column storage of a matrix of fragment counts,
+    the training set rows that contain each fragment are stored together"""
+
+    def __init__(self, counts):
+        """Compress a dense array of fragment counts"""
+        self.shape = counts.shape
+        self.dtype = counts.dtype
+        cols, rows = np.nonzero(counts.T)
+        self.indptr = np.zeros(counts.shape[1] + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum(np.count_nonzero(counts, axis=0))
+        self.indices = rows.astype(np.min_scalar_type(max(counts.shape[0] - 1, 0)))
+        self.data = counts.T[cols, rows]
+        if np.issubdtype(self.dtype, np.integer) and len(self.data):
+            self.data = self.data.astype(np.promote_types(np.min_scalar_type(int(self.data.min())),
+                                                          np.min_scalar_type(int(self.data.max()))))
+
+    def columns(self, begin):
+        """Return a view of the columns from begin onwards, sharing the stored arrays"""
+        view = copy.copy(self)
+        view.indptr = self.indptr[begin:]
+        view.shape = (self.shape[0], self.shape[1] - begin)
+        return view
+
+    def column(self, c):
+        """Return the row indices and counts of the non-zero values in a column"""
+        return self.indices[self.indptr[c]:self.indptr[c+1]], self.data[self.indptr[c]:self.indptr[c+1]]
+
+    def row_nonzero(self):
+        """Return the number of non-zero values in each row"""
+        return np.bincount(self.indices[self.indptr[0]:self.indptr[-1]], minlength=self.shape[0])
+
+    def toarray(self):
+        """Return the counts as a dense array"""
+        counts = np.zeros(self.shape, dtype=self.dtype)
+        for c in range(self.shape[1]):
+            rows, values = self.column(c)
+            counts[rows, c] = values
+        return counts
+
+
+def _calculate_fragment_similarity_matrix(counts_matrix, train_counts, stdev_array, train_nonzero, rowmask=None):
+    """Calculate Tanimoto similarity coefficients between each row of a matrix of fragment counts and every row
+    of a training set stored as _SparseCounts, optionally only for the training rows selected by rowmask"""
+    # same definitions as _calculate_fragment_similarity, but each sum is taken
+    # over all pairs of query and training chemicals at once
+    nqueries = counts_matrix.shape[0]
+    ntrain = train_counts.shape[0]
+    # gather every pair of non-zero query and training set counts of the same fragment
+    queries, cols = np.nonzero(counts_matrix)
+    starts = train_counts.indptr[cols]
+    lengths = train_counts.indptr[cols+1] - starts
+    entries = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    rows = train_counts.indices[entries].astype(np.int64)
+    diff = np.repeat(counts_matrix[queries, cols], lengths) - train_counts.data[entries]
+    queries = np.repeat(queries, lengths)
+    cols = np.repeat(cols, lengths)
+    if rowmask is not None:
+        keep = rowmask[rows]
+        rows, diff, queries, cols = rows[keep], diff[keep], queries[keep], cols[keep]
+    pairs = queries * ntrain + rows
+    # number of shared non-zero fragments (a-values), b-values follow from that
+    shared = np.bincount(pairs, minlength=nqueries * ntrain).reshape(nqueries, ntrain)
+    b = np.count_nonzero(counts_matrix, axis=1)[:, np.newaxis] + train_nonzero[np.newaxis, :] - shared
+    # remove those with different counts from the a1s
+    amask2 = diff != 0
+    a1 = shared - np.bincount(pairs[amask2], minlength=nqueries * ntrain).reshape(nqueries, ntrain)
+    # calculate non-zero and non-one a-values only where stdev != 0 and
+    # sum them per pair of chemicals
+    zmask = np.logical_and(amask2, stdev_array[cols] != 0)
+    aa = np.abs(diff[zmask]) / stdev_array[cols[zmask]]
+    a = 1 - (2 * _normcdfapprox(aa) - 1)
+    asum = a1 + np.bincount(pairs[zmask], weights=a, minlength=nqueries * ntrain).reshape(nqueries, ntrain)
+    a2sum = a1 + np.bincount(pairs[zmask], weights=a ** 2, minlength=nqueries * ntrain).reshape(nqueries, ntrain)
+    # calculate tanimoto => sum(ab) / [sum(a2) + sum(b2) - sum(ab)]
+    tanimoto = np.zeros((nqueries, ntrain))
+    bmask = b != 0
+    tanimoto[bmask] = asum[bmask] / (a2sum[bmask] + b[bmask] - asum[bmask])
+    return tanimoto
+
+
+def _calculate_topn_fragment_similarity(counts_array, train_counts, stdev_array, train_nonzero, topn=5, blocksize=64):
+    """Calculate Tanimoto similarity coefficients between an array of fragment counts and the training set
+    chemicals that can be among the topn most similar, all other similarities are left as 0"""
+    tanimoto = np.zeros(train_counts.shape[0])
+    cols = np.nonzero(counts_array)[0]
+    if len(cols) == 0:
+        return tanimoto
+    # count shared non-zero fragments for every training chemical from the stored columns,
+    # chemicals without any shared fragments have a similarity of 0
+    shared = np.bincount(np.concatenate([train_counts.column(c)[0] for c in cols]), minlength=train_counts.shape[0])
+    candidates = np.nonzero(shared)[0]
+    # sum(a)/sum(b) is the maximum possible similarity (see _calculate_fragment_similarity),
+    # visit candidates from the highest bound down and stop once the bound can not reach the topn
+    bound = shared[candidates] / (len(cols) + train_nonzero[candidates] - shared[candidates])
+    order = np.argsort(-bound, kind='stable')
+    candidates = candidates[order]
+    bound = bound[order]
+    for bbegin in range(0, len(candidates), blocksize):
+        if bbegin >= topn and bound[bbegin] < np.partition(tanimoto[candidates[:bbegin]], -topn)[-topn]:
+            break
+        block = candidates[bbegin:bbegin+blocksize]
+        rowmask = np.zeros(train_counts.shape[0], dtype=bool)
+        rowmask[block] = True
+        tanimoto[block] = _calculate_fragment_similarity_matrix(counts_array[np.newaxis, :],
+                                                                train_counts,
+                                                                stdev_array,
+                                                                train_nonzero,
+                                                                rowmask)[0, block]
+    return tanimoto
+
+
+def _calculate_css(fragsim, value_dissimilarity, topn=5):
+    """Calculate the CSS from the topn most similar training set chemicals"""
+    # find the topn-th largest similarity then keep every chemical at least
+    # as similar so that ties are broken by value dissimilarity, as in a
+    # descending sort of (similarity, value dissimilarity) pairs
+    cutoff = fragsim[np.argpartition(fragsim, -topn)[-topn]]
+    candidates = np.nonzero(fragsim >= cutoff)[0]
+    order = np.lexsort((value_dissimilarity[candidates], fragsim[candidates]))[::-1][:topn]
+    css = 1
+    for i in candidates[order]:
+        css *= (fragsim[i] * (1 - value_dissimilarity[i])) ** 0.5
+    return css ** (1 / float(topn))
+
+
+# OBSmartsPatterns shared between all loaded models, keyed by SMARTS string
+_smarts_registry = {}
+# models loading in parallel threads create patterns one at a time
+_smarts_lock = threading.Lock()
+# atoms of each element and whether a ring is needed to match each pattern, keyed by pattern
+_smarts_requirements = {}
+
+
+def _get_smarts_pattern(smarts):
+    """Return the OBSmartsPattern for a SMARTS string, creating it only once for all models"""
+    with _smarts_lock:
+        if smarts not in _smarts_registry:
+            pattern = ob.OBSmartsPattern()
+            pattern.Init(smarts)
+            _smarts_registry[smarts] = pattern
+            # GetAtomicNum is only non-zero for pattern atoms that can match just one element,
+            # hydrogens are left out because they are only atoms in the explicit hydrogen view
+            elements = {}
+            for i in range(pattern.NumAtoms()):
+                atomicnum = pattern.GetAtomicNum(i)
+                if atomicnum > 1:
+                    elements[atomicnum] = elements.get(atomicnum, 0) + 1
+            # a ring closure outside of the atom expressions closes a cycle that any match must also have
+            needsring = False
+            depth = 0
+            for char in smarts:
+                if char == '[':
+                    depth += 1
+                elif char == ']':
+                    depth -= 1
+                elif depth == 0 and (char.isdigit() or char == '%'):
+                    needsring = True
+                    break
+            _smarts_requirements[pattern] = (elements, needsring)
+        return _smarts_registry[smarts]
+
+
+def _match_smarts(pattern, molecule, explicith):
+    """Return the unique matches of a shared OBSmartsPattern in the hydrogen view of an IFSMol,
+    each pattern is only matched once for each view of the molecule and then remembered"""
+    key = (explicith, pattern)
+    if key not in molecule.smartsmatches:
+        # skip the matcher if the molecule does not have the atoms or the ring the pattern needs
+        elements, needsring = _smarts_requirements[pattern]
+        elementcounts, numrings = molecule.get_composition(explicith)
+        if (needsring and numrings == 0) or \
+                any(elementcounts.get(atomicnum, 0) < count for atomicnum, count in elements.items()):
+            molecule.smartsmatches[key] = tuple()
+        else:
+            molecule.smartsmatches[key] = context.get_context().match(pattern, molecule.get_hydrogen_view(explicith))
+    return molecule.smartsmatches[key]
+
+
+# optional persistent cache of fragment counts, see set_fragment_count_cache
+_count_cache = None
+_count_cache_pending = 0
+# the connection is shared by all threads, so every use of it and of the pending count holds this lock
+_count_cache_lock = threading.Lock()
+
+
+def set_fragment_count_cache(directory=None):
+    """Store fragment counts in a SQLite file in directory and reuse them in this and later sessions.
+
+    Counts are keyed by model module, model version, sha256 hash of the model source and normalized SMILES,
+    so counts are not reused once the fragments of a model are edited. Passing None (default) writes any
+    pending counts and stops using the cache.
+    """
+    global _count_cache, _count_cache_pending
+    with _count_cache_lock:
+        if _count_cache is not None:
+            _count_cache.commit()
+            _count_cache.close()
+            _count_cache = None
+            _count_cache_pending = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            _count_cache = sqlite3.connect(os.path.join(directory, 'ifsqsar_fragment_counts.sqlite'), check_same_thread=False)
+            # counts of caches written before the source hash was part of the key can not be checked, drop them
+            columns = [column[1] for column in _count_cache.execute('PRAGMA table_info(fragment_counts)')]
+            if columns and 'source_sha256' not in columns:
+                _count_cache.execute('DROP TABLE fragment_counts')
+            _count_cache.execute('CREATE TABLE IF NOT EXISTS fragment_counts (model_module TEXT, version INTEGER, '
+                                 'source_sha256 TEXT, normsmiles TEXT, dtype TEXT, counts BLOB, '
+                                 'PRIMARY KEY (model_module, version, source_sha256, normsmiles))')
+            _count_cache.commit()
+
+
+# write pending counts when the interpreter exits
+atexit.register(set_fragment_count_cache)
+
+
+class PredictionCache:
+    """Least recently used cache of the predictions calculated by all QSARs, keyed by model module and normalized SMILES.
+
+    Only calculated results are kept here, experimental and user values stay in the stored data of each model.
+    The cache holds at most capacity results (0 turns it off) and counts the hits and misses of lookups.
+    """
+
+    def __init__(self, capacity):
+        """Create an empty cache"""
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, model_module, normsmiles):
+        """Return the cached result of a model for a molecule, or None if it is not cached"""
+        key = (model_module, normsmiles)
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, model_module, normsmiles, result):
+        """Add the result of a model for a molecule, evicting the least recently used results if full"""
+        with self.lock:
+            self.entries[(model_module, normsmiles)] = result
+            self.entries.move_to_end((model_module, normsmiles))
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def remove(self, model_module, normsmiles=None, ul=None):
+        """Remove the results of a model, optionally only of one molecule or only those with a specific UL"""
+        with self.lock:
+            for key in list(self.entries.keys()):
+                if key[0] == model_module and (normsmiles is None or key[1] == normsmiles) and \
+                        (ul is None or self.entries[key][1] == ul):
+                    self.entries.pop(key)
+
+    def resize(self, capacity):
+        """Change the maximum number of results, evicting the least recently used results if needed"""
+        with self.lock:
+            self.capacity = capacity
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all results and reset the hit and miss counts"""
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return the capacity, number of cached results, hits and misses as a dict"""
+        with self.lock:
+            return {'capacity': self.capacity, 'size': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# calculated predictions of all models, see set_prediction_cache_size
+_prediction_cache = PredictionCache(65536)
+
+
+def set_prediction_cache_size(capacity):
+    """Set the maximum number of calculated predictions kept in memory for all QSARs, 0 turns caching off"""
+    if type(capacity) is not int or capacity < 0:
+        raise ValueError('Prediction cache capacity must be an int >= 0')
+    _prediction_cache.resize(capacity)
+
+
+def get_prediction_cache_stats():
+    """Return the capacity, number of cached predictions, hits and misses of the prediction cache as a dict"""
+    return _prediction_cache.stats()
+
+
+# binary model artifacts written by build_model_artifacts, large array fields are stored
+# as .npy files and memory-mapped on load, the stored values as json, the rest of the
+# model module is kept as a small python module without the array literals
+_artifact_format = 1
+_artifact_arrays = ('datalist', 'train_counts', 'validate_counts', 'fragmentlist', 'coefficientarrays', 'neg_dom_check')
+_artifact_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts')
+
+
+def set_artifact_directory(directory):
+    """Set the directory in which models look for binary artifacts and the model bundle when they are loaded"""
+    global _artifact_directory, _bundle
+    _artifact_directory = directory
+    _bundle = None
+
+
+def _find_source_spec(model_module):
+    """Find the module spec of the source file of a model module, also if it was imported from artifacts"""
+    package = model_module.rsplit('.', 1)[0]
+    return importlib.machinery.PathFinder.find_spec(model_module, importlib.import_module(package).__path__)
+
+
+def _source_sha256(model_module):
+    """Return the sha256 hash of the source file of a model module, or None if it does not exist"""
+    spec = _find_source_spec(model_module)
+    if spec is None or spec.origin is None or not os.path.isfile(spec.origin):
+        return None
+    with open(spec.origin, 'rb') as sourcefile:
+        return hashlib.sha256(sourcefile.read()).hexdigest()
+
+
+def _artifact_field_loader(module, path, fields):
+    """Return a module __getattr__ function that memory-maps the array fields of a model module
+    from its artifacts when they are first accessed and then keeps them in the module"""
+    def __getattr__(name):
+        if name not in fields:
+            raise AttributeError('module {} has no attribute {}'.format(module.__name__, name))
+        value = np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+        # compressed like in QSARModel.load
+        if name == 'validate_counts':
+            value = _SparseCounts(value)
+        setattr(module, name, value)
+        return value
+    return __getattr__
+
+
+def _current_artifacts(model_module):
+    """Return the artifact path and manifest of a model module if they are up to date with the module source"""
+    path = os.path.join(_artifact_directory, model_module.rsplit('.', 1)[-1])
+    if os.path.isfile(os.path.join(path, 'manifest.json')):
+        with open(os.path.join(path, 'manifest.json'), 'r') as manifestfile:
+            manifest = json.load(manifestfile)
+        if manifest['format'] == _artifact_format and manifest['source_sha256'] == _source_sha256(model_module):
+            return path, manifest
+    return None, None
+
+
+def _compile_model_source(model_module):
+    """Compile the source of a model module, returns the marshalled code and the time taken,
+    run in worker processes because compiling the large data modules is most of their import time"""
+    start = time.perf_counter()
+    spec = _find_source_spec(model_module)
+    with open(spec.origin, 'rb') as sourcefile:
+        code = compile(sourcefile.read(), spec.origin, 'exec', dont_inherit=True)
+    return marshal.dumps(code), time.perf_counter() - start
+
+
+# one lock per model module, so that a module is only imported by one thread and
+# other threads wait for it to be complete instead of seeing it half imported
+_import_locks = {}
+_import_locks_lock = threading.Lock()
+
+
+def _import_model_module(model_module, compiled=None):
+    """Import a model module, from its binary artifacts if they are up to date with the module source,
+    or from code compiled by _compile_model_source if it is passed"""
+    with _import_locks_lock:
+        lock = _import_locks.setdefault(model_module, threading.Lock())
+    with lock:
+        if model_module in sys.modules:
+            # import_module waits for a module that is still being imported by an import statement
+            return importlib.import_module(model_module)
+        with profiling.phase('model import', model_module):
+            return _import_model_module_uncached(model_module, compiled)
+
+
+def _import_model_module_uncached(model_module, compiled):
+    """Import a model module that is not in sys.modules, see _import_model_module"""
+    path, manifest = _current_artifacts(model_module)
+    if path is not None:
+        spec = importlib.util.spec_from_file_location(model_module, os.path.join(path, 'metadata.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.__getattr__ = _artifact_field_loader(module, path, manifest['arrays'])
+        if manifest['stored']:
+            with open(os.path.join(path, 'stored.json'), 'r') as storedfile:
+                module.stored = dict((normsmiles, tuple(value)) for normsmiles, value in json.load(storedfile))
+        sys.modules[model_module] = module
+        return module
+    if compiled is not None:
+        module = importlib.util.module_from_spec(_find_source_spec(model_module))
+        sys.modules[model_module] = module
+        try:
+            exec(marshal.loads(compiled), module.__dict__)
+        except BaseException:
+            sys.modules.pop(model_module)
+            raise
+        return module
+    return importlib.import_module(model_module)
+
+
+def build_model_artifacts(qsarlist=None, directory=None):
+    """Write binary artifacts of QSAR model modules so that they load faster, returns the names of the built models.
+
+    Arguments:
+        qsarlist -- list of QSARModels to build, default is all QSARModels (Meta QSARs are skipped)
+        directory -- directory to write the artifacts to, default is the directory used when loading models
+
+    The artifacts are only used while the hash of the model module source matches, so they have
+    to be rebuilt after a model module is edited. Needs python 3.8 or later to parse the source.
+    """
+    if qsarlist is None:
+        qsarlist = [qsar for qsar in globals().values() if isinstance(qsar, QSARModel)]
+    if directory is None:
+        directory = _artifact_directory
+    built = []
+    for qsar in qsarlist:
+        if not isinstance(qsar, QSARModel) or qsar.model_module in [q.model_module for q in built]:
+            continue
+        sourcehash = _source_sha256(qsar.model_module)
+        if sourcehash is None:
+            continue
+        spec = _find_source_spec(qsar.model_module)
+        with open(spec.origin, 'r') as sourcefile:
+            sourcelines = sourcefile.read().splitlines(True)
+        # read values from a fresh import of the python module
+        module = importlib.import_module(qsar.model_module)
+        if getattr(module, '__file__', None) != spec.origin:
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        path = os.path.join(directory, qsar.model_module.rsplit('.', 1)[-1])
+        os.makedirs(path, exist_ok=True)
+        # the manifest is written last so that incomplete artifacts are never loaded
+        if os.path.isfile(os.path.join(path, 'manifest.json')):
+            os.remove(os.path.join(path, 'manifest.json'))
+        # find the top level assignments of the fields that are stored in binary form
+        manifest = {'format': _artifact_format, 'source_sha256': sourcehash, 'arrays': [], 'stored': False}
+        removelines = set()
+        for node in ast.parse(''.join(sourcelines)).body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                field = node.targets[0].id
+                if field in _artifact_arrays:
+                    np.save(os.path.join(path, field + '.npy'), getattr(module, field))
+                    manifest['arrays'].append(field)
+                elif field == 'stored':
+                    with open(os.path.join(path, 'stored.json'), 'w') as storedfile:
+                        json.dump(list(module.stored.items()), storedfile)
+                    manifest['stored'] = True
+                else:
+                    continue
+                removelines.update(range(node.lineno - 1, node.end_lineno))
+        with open(os.path.join(path, 'metadata.py'), 'w') as metadatafile:
+            metadatafile.write(''.join(line for i, line in enumerate(sourcelines) if i not in removelines))
+        with open(os.path.join(path, 'manifest.json'), 'w') as manifestfile:
+            json.dump(manifest, manifestfile)
+        built.append(qsar)
+    return [qsar.model_name for qsar in built]
+
+
+# bundle of derived model state written by build_model_bundle, one uncompressed .npz file in the
+# artifact directory holding the values that QSARModel.load and load_domain would otherwise compute,
+# and the leverage factors of the Meta QSAR training sets keyed by the hash of the training set
+_bundle_format = 1
+_bundle_filename = 'model_bundle.npz'
+_bundle = None
+
+
+def _get_bundle():
+    """Open the model bundle in the artifact directory once, returns (arrays, manifest) or (None, None)"""
+    global _bundle
+    if _bundle is None:
+        _bundle = (None, None)
+        path = os.path.join(_artifact_directory, _bundle_filename)
+        if os.path.isfile(path):
+            # the bundle is small, so all arrays are read at once and models
+            # loading in parallel threads do not share the open file
+            with np.load(path) as bundlefile:
+                arrays = dict(bundlefile)
+            manifest = json.loads(arrays['manifest'].tobytes().decode('utf-8'))
+            if manifest['format'] == _bundle_format:
+                _bundle = (arrays, manifest)
+    return _bundle
+
+
+def _bundle_current(model_module):
+    """Check if the bundle holds the derived state of a model module built from its current source"""
+    arrays, manifest = _get_bundle()
+    return arrays is not None and model_module in manifest['modules'] and \
+        manifest['modules'][model_module] == _source_sha256(model_module)
+
+
+def _trainset_sha256(trainset):
+    """Return the sha256 hash of a training set matrix, used to find its leverage factor in the bundle"""
+    trainset = np.ascontiguousarray(trainset, dtype=float)
+    return hashlib.sha256(str(trainset.shape).encode('utf-8') + trainset.tobytes()).hexdigest()
+
+
+def _bundle_sha256(arrays):
+    """Return the sha256 hash of the content of a bundle, the arrays are hashed in order of their names"""
+    content = hashlib.sha256()
+    for name in sorted(arrays):
+        if name == 'manifest':
+            continue
+        array = np.ascontiguousarray(arrays[name])
+        content.update('{} {} {}'.format(name, array.dtype.str, array.shape).encode('utf-8'))
+        content.update(array.tobytes())
+    return content.hexdigest()
+
+
+def build_model_bundle(qsarlist=None, directory=None):
+    """Write the derived state of QSAR models to a single bundle file, returns the content hash of the bundle.
+
+    Arguments:
+        qsarlist -- list of QSARModels and METAQSARModels to bundle, default is all models
+        directory -- directory to write the bundle to, default is the directory used when loading models
+
+    The bundle holds the decoded SMARTS, mean coefficients, leverage factors, value dissimilarities,
+    sparse training set counts and negative domain checks of QSARModels and the leverage factors of
+    Meta QSARs. The state of a QSARModel is only used while the hash of its module source matches.
+    """
+    global _bundle
+    if qsarlist is None:
+        qsarlist = [qsar for qsar in globals().values() if isinstance(qsar, (QSARModel, METAQSARModel))]
+    if directory is None:
+        directory = _artifact_directory
+    arrays = {}
+    manifest = {'format': _bundle_format, 'modules': {}}
+    for qsar in qsarlist:
+        sourcehash = _source_sha256(qsar.model_module)
+        if sourcehash is None or qsar.model_module in manifest['modules']:
+            continue
+        qsar.load()
+        namespace = qsar.model_namespace
+        if isinstance(qsar, METAQSARModel):
+            if hasattr(namespace, 'leverage_factor'):
+                key = 'leverage/' + _trainset_sha256(namespace.emptrainset) + '/'
+                arrays[key + 'rinv'] = namespace.leverage_factor.rinv
+                arrays[key + 'condition_number'] = np.array(namespace.leverage_factor.condition_number)
+            continue
+        key = qsar.model_module + '/'
+        arrays[key + 'smarts'] = np.array([smarts if type(smarts) == str else smarts.GetSMARTS()
+                                           for smarts in namespace.smartslist], dtype=str)
+        arrays[key + 'coefficientarray'] = namespace.coefficientarray
+        if namespace.domain:
+            qsar.load_domain()
+            arrays[key + 'rinv'] = namespace.leverage_factor.rinv
+            arrays[key + 'condition_number'] = np.array(namespace.leverage_factor.condition_number)
+            arrays[key + 'value_dissimilarity'] = namespace.value_dissimilarity
+            arrays[key + 'train_counts_shape'] = np.array(namespace.train_counts.shape)
+            arrays[key + 'train_counts_dtype'] = np.array(namespace.train_counts.dtype.str)
+            arrays[key + 'train_counts_indptr'] = namespace.train_counts.indptr
+            arrays[key + 'train_counts_indices'] = namespace.train_counts.indices
+            arrays[key + 'train_counts_data'] = namespace.train_counts.data
+            arrays[key + 'train_nonzero'] = namespace.train_nonzero
+            arrays[key + 'neg_dom_check'] = np.array([(pattern1.GetSMARTS(), pattern2.GetSMARTS(), description)
+                                                      for pattern1, pattern2, description in namespace.neg_dom_check_init],
+                                                     dtype=str).reshape(-1, 3)
+        manifest['modules'][qsar.model_module] = sourcehash
+    manifest['content_sha256'] = _bundle_sha256(arrays)
+    arrays['manifest'] = np.frombuffer(json.dumps(manifest).encode('utf-8'), dtype=np.uint8)
+    # write to a temporary file and replace the bundle so that a partial bundle is never loaded
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _bundle_filename)
+    with open(path + '.tmp', 'wb') as bundlefile:
+        np.savez(bundlefile, **arrays)
+    os.replace(path + '.tmp', path)
+    # reopen the bundle when it is next needed
+    _bundle = None
+    return manifest['content_sha256']
+
+
+def check_model_bundle(directory=None):
+    """Check the model bundle against its content hash and the model module sources, returns the stale modules.
+
+    Arguments:
+        directory -- directory of the bundle, default is the directory used when loading models
+
+    Raises a RuntimeError if there is no bundle, it is another format or its content does not match its hash.
+    """
+    if directory is None:
+        directory = _artifact_directory
+    path = os.path.join(directory, _bundle_filename)
+    if not os.path.isfile(path):
+        raise RuntimeError('No model bundle found in {}'.format(directory))
+    with np.load(path) as arrays:
+        manifest = json.loads(arrays['manifest'].tobytes().decode('utf-8'))
+        if manifest['format'] != _bundle_format:
+            raise RuntimeError('Model bundle format {} is not the current format {}'.format(manifest['format'], _bundle_format))
+        if _bundle_sha256(arrays) != manifest['content_sha256']:
+            raise RuntimeError('Model bundle content does not match its hash')
+    return [model_module for model_module, sourcehash in manifest['modules'].items()
+            if _source_sha256(model_module) != sourcehash]
+
+
+# leverages this close to 1 are taken as leverage > 1, so that the rounding error of the factorization
+# does not move a chemical with a leverage of exactly 1 (a fragment only in one training chemical) to UL 2
+leverage_tolerance = 1e-9
+
+
+def _warn_illconditioned(model_name, leverage_factor):
+    """Warn that the leverages of a model are unreliable if its training set matrix is ill-conditioned"""
+    if leverage_factor.illconditioned:
+        warnings.warn('training set of {} is ill-conditioned (condition number {:.3g}), its leverages may be '
+                      'inaccurate'.format(model_name, leverage_factor.condition_number), RuntimeWarning)
+
+
+class LeverageFactor:
+    """Stores a factorization of a training set matrix X and calculates the leverage
+    x (X^T X)^-1 x^T of new chemicals without forming the explicit inverse of X^T X"""
+
+    def __init__(self, trainset, bundled=None):
+        """Factor the training set as X = QR, so that X^T X = R^T R, or take (R^-1, condition number)
+        from the model bundle, which is also searched for the factorization of the training set"""
+        if bundled is None:
+            arrays, manifest = _get_bundle()
+            if arrays is not None:
+                key = 'leverage/' + _trainset_sha256(trainset) + '/'
+                if key + 'rinv' in arrays:
+                    bundled = (arrays[key + 'rinv'], float(arrays[key + 'condition_number']))
+        if bundled is not None:
+            self.rinv, self.condition_number = bundled
+        else:
+            with profiling.phase('xtxi inversion', '{}x{} training set'.format(*np.shape(trainset))):
+                r = np.linalg.qr(np.asarray(trainset, dtype=float), mode='r')
+                # the singular values of R are those of X, the condition number of X^T X is the square of this
+                self.condition_number = np.linalg.cond(r)
+                # x (X^T X)^-1 x^T = |x R^-1|^2, R is triangular so its inverse is computed once here
+                self.rinv = np.linalg.solve(r, np.identity(r.shape[0]))
+        # above this the explicit inverse of X^T X would have lost all precision
+        self.illconditioned = not self.condition_number < 1. / np.finfo(float).eps ** 0.5
+
+    def leverage(self, x):
+        """Return the leverage of one chemical (1D array) or of each row of a 2D array"""
+        z = np.matmul(x, self.rinv)
+        return (z * z).sum(axis=-1)
+
+
+def _allows_chemical_inputs(chemical_inputs, nsolutes, nsolvents, ncomponents):
+    """Check if a model accepts the numbers of solutes, solvents and components in its chemical_inputs"""
+    return chemical_inputs['solute min'] <= nsolutes <= chemical_inputs['solute max'] and \
+        chemical_inputs['solvent min'] <= nsolvents <= chemical_inputs['solvent max'] and \
+        chemical_inputs['component min'] <= ncomponents <= chemical_inputs['component max'] and \
+        chemical_inputs['total min'] <= nsolutes + nsolvents + ncomponents <= chemical_inputs['total max']
+
+
 class QSARModel:
     """Class that loads a QSAR stored as a python module and applies it
     to molecules passed to it as IFSMols (subclass of openbabel mols)"""
@@ -71,6 +742,17 @@ class QSARModel:
         self.version = version
         self.super_models = []
         self.default_stored = {}
+        # least recently used cache of applicability domain results keyed by fragment counts
+        self.domain_cache = collections.OrderedDict()
+        self.domain_cache_size = 4096
+        self.domain_cache_lock = threading.Lock()
+        self.domain_loaded = False
+        self.bundled = False
+        # held while the model or its applicability domain is loaded, model_namespace and
+        # domain_loaded are only set once everything they stand for is ready
+        self.load_lock = threading.RLock()
+        # sha256 hash of the model source that keys the persistent fragment count cache, found when first needed
+        self.source_sha256 = None
 
     def __str__(self):
         return self.model_name
@@ -82,37 +764,96 @@ class QSARModel:
         """Import the QSAR python module"""
         if self.model_namespace is not None:
             return
-        self.model_namespace = importlib.import_module(self.model_module)
-        self.model_namespace.smartslist = []
-        for smarts in self.model_namespace.fragmentlist['smarts']:
-            if smarts == b'intercept':
-                self.model_namespace.smartslist.append('intercept')
-            elif smarts == b'sssr':
-                self.model_namespace.smartslist.append('sssr')
-            elif smarts == b'MW':
-                self.model_namespace.smartslist.append('MW')
-            else:
-                pattern = ob.OBSmartsPattern()
-                pattern.Init(smarts.decode('utf-8'))
-                self.model_namespace.smartslist.append(pattern)
-        self.model_namespace.coefficientarray = np.mean(self.model_namespace.coefficientarrays, axis=1)
-        if self.model_namespace.domain:
-            if self.model_namespace.intercept:
-                self.model_namespace.xtxi = np.linalg.inv(
-                    np.matmul(self.model_namespace.train_counts[:, 1:].T, self.model_namespace.train_counts[:, 1:]))
+        with self.load_lock:
+            if self.model_namespace is not None:
+                return
+            namespace = _import_model_module(self.model_module)
+            # take the decoded SMARTS and coefficients from the bundle if it is up to date
+            self.bundled = _bundle_current(self.model_module)
+            if self.bundled:
+                bundle = _get_bundle()[0]
+                smartsstrings = bundle[self.model_module + '/smarts'].tolist()
+                namespace.coefficientarray = bundle[self.model_module + '/coefficientarray']
             else:
-                self.model_namespace.xtxi = np.linalg.inv(
-                    np.matmul(self.model_namespace.train_counts.T, self.model_namespace.train_counts))
-            self.model_namespace.neg_dom_check_init = []
+                smartsstrings = [smarts.decode('utf-8') for smarts in namespace.fragmentlist['smarts']]
+                namespace.coefficientarray = np.mean(namespace.coefficientarrays, axis=1)
+            smartslist = []
+            with profiling.phase('smarts compilation', self.model_name):
+                for smarts in smartsstrings:
+                    if smarts in ('intercept', 'sssr', 'MW'):
+                        smartslist.append(smarts)
+                    else:
+                        smartslist.append(_get_smarts_pattern(smarts))
+            namespace.smartslist = smartslist
+            # validation counts are compressed here if the module has already read them,
+            # otherwise they are compressed when they are first read from the artifacts
+            if isinstance(vars(namespace).get('validate_counts'), np.ndarray):
+                namespace.validate_counts = _SparseCounts(namespace.validate_counts)
+            # backup the stored data for reset and restore
+            self.default_stored = namespace.stored.copy()
+            self.model_namespace = namespace
+
+    def load_domain(self):
+        """Prepare the training set data needed for the applicability domain, only done when first needed"""
+        # check if model has been loaded
+        if self.model_namespace is None:
+            self.load()
+        if self.domain_loaded or not self.model_namespace.domain:
+            return
+        with self.load_lock:
+            if self.domain_loaded:
+                return
+            with profiling.phase('applicability domain', self.model_name):
+                if self.bundled:
+                    self._load_bundled_domain()
+                else:
+                    self._load_domain_from_training_set()
+            self.domain_loaded = True
+
+    def _load_domain_from_training_set(self):
+        """Calculate the applicability domain state from the training set data"""
+        if self.model_namespace.intercept:
+            self.model_namespace.leverage_factor = LeverageFactor(self.model_namespace.train_counts[:, 1:])
+        else:
+            self.model_namespace.leverage_factor = LeverageFactor(self.model_namespace.train_counts)
+        _warn_illconditioned(self.model_name, self.model_namespace.leverage_factor)
+        self.model_namespace.value_dissimilarity = \
+            1 - self.model_namespace.datalist['value_similarity'][:self.model_namespace.train_counts.shape[0]]
+        # replace the dense fragment counts with sparse storage, which also indexes
+        # the training chemicals that contain each fragment
+        self.model_namespace.train_counts = _SparseCounts(self.model_namespace.train_counts)
+        if self.model_namespace.intercept:
+            self.model_namespace.train_nonzero = self.model_namespace.train_counts.columns(1).row_nonzero()
+        else:
+            self.model_namespace.train_nonzero = self.model_namespace.train_counts.row_nonzero()
+        self.model_namespace.neg_dom_check_init = []
+        with profiling.phase('smarts compilation', self.model_name):
             for s in range(self.model_namespace.neg_dom_check.shape[0]):
                 smarts1, smarts2, description = self.model_namespace.neg_dom_check[s]
-                pattern1 = ob.OBSmartsPattern()
-                pattern1.Init(smarts1.decode('utf-8'))
-                pattern2 = ob.OBSmartsPattern()
-                pattern2.Init(smarts2.decode('utf-8'))
+                pattern1 = _get_smarts_pattern(smarts1.decode('utf-8'))
+                pattern2 = _get_smarts_pattern(smarts2.decode('utf-8'))
                 self.model_namespace.neg_dom_check_init.append((pattern1, pattern2, description.decode('utf-8')))
-        # backup the stored data for reset and restore
-        self.default_stored = self.model_namespace.stored.copy()
+
+    def _load_bundled_domain(self):
+        """Take the applicability domain state from the bundle instead of the training set data"""
+        bundle = _get_bundle()[0]
+        key = self.model_module + '/'
+        self.model_namespace.leverage_factor = LeverageFactor(None, bundled=(bundle[key + 'rinv'],
+                                                                             float(bundle[key + 'condition_number'])))
+        _warn_illconditioned(self.model_name, self.model_namespace.leverage_factor)
+        self.model_namespace.value_dissimilarity = bundle[key + 'value_dissimilarity']
+        train_counts = _SparseCounts.__new__(_SparseCounts)
+        train_counts.shape = tuple(bundle[key + 'train_counts_shape'].tolist())
+        train_counts.indptr = bundle[key + 'train_counts_indptr']
+        train_counts.indices = bundle[key + 'train_counts_indices']
+        train_counts.data = bundle[key + 'train_counts_data']
+        train_counts.dtype = np.dtype(bundle[key + 'train_counts_dtype'].item())
+        self.model_namespace.train_counts = train_counts
+        self.model_namespace.train_nonzero = bundle[key + 'train_nonzero']
+        self.model_namespace.neg_dom_check_init = []
+        with profiling.phase('smarts compilation', self.model_name):
+            for smarts1, smarts2, description in bundle[key + 'neg_dom_check'].tolist():
+                self.model_namespace.neg_dom_check_init.append((_get_smarts_pattern(smarts1), _get_smarts_pattern(smarts2), description))
 
     def set_stored(self, normsmiles, value, ul='U', error=np.nan, ulnote='user value', citation='user value', units=None, endpoint=None):
         """Add a stored value with user-entered data"""
@@ -158,6 +899,7 @@ class QSARModel:
             self.load()
         if normsmiles in self.model_namespace.stored:
             self.model_namespace.stored.pop(normsmiles)
+        _prediction_cache.remove(self.model_module, normsmiles=normsmiles)
         if propagateup:
             for qsar in self.super_models:
                 qsar.remove_stored(normsmiles, propagateup=propagateup)
@@ -168,6 +910,7 @@ class QSARModel:
         if self.model_namespace is None:
             self.load()
         self.model_namespace.stored = self.default_stored.copy()
+        _prediction_cache.remove(self.model_module)
         if propagateup:
             for qsar in self.super_models:
                 qsar.reset_stored(propagateup=propagateup)
@@ -190,6 +933,7 @@ class QSARModel:
         for key in list(self.model_namespace.stored.keys()):
             if self.model_namespace.stored[key][1] == 'U':
                 self.model_namespace.stored.pop(key)
+        _prediction_cache.remove(self.model_module, ul='U')
         if propagateup:
             for qsar in self.super_models:
                 qsar.erase_user_stored(propagateup=propagateup)
@@ -202,6 +946,7 @@ class QSARModel:
         for key in list(self.model_namespace.stored.keys()):
             if self.model_namespace.stored[key][1] == 'E':
                 self.model_namespace.stored.pop(key)
+        _prediction_cache.remove(self.model_module, ul='E')
         if propagateup:
             for qsar in self.super_models:
                 qsar.erase_experimental_stored(propagateup=propagateup)
@@ -212,32 +957,32 @@ class QSARModel:
         if self.model_namespace is None:
             self.load()
         self.model_namespace.stored = {}
+        _prediction_cache.remove(self.model_module)
         if propagateup:
             for qsar in self.super_models:
                 qsar.erase_all_stored(propagateup=propagateup)
 
-    def apply_model(self, solutes=tuple(), solvents=tuple(), components=tuple(), solutef=tuple(), solventf=tuple(), componentf=tuple()):
-        """Take openbabel mol in a list, apply the QSAR and return the results"""
+    def get_fragment_counts(self, molecule):
+        """Return the fragment counts of an IFSMol as an array in the order of the model fragment list"""
+        global _count_cache_pending
         # check if model has been loaded
         if self.model_namespace is None:
             self.load()
-        # first test if this molecule is stored and pass stored results if so
-        if solutes[0].normsmiles in self.model_namespace.stored:
-            return self.model_namespace.stored[solutes[0].normsmiles]
-        # assert that there is the correct number of solutes and solvents
-        # current assumption for QSARs is that only one chemical is handled at a time,
-        # designated as a solute regardless of property type
-        if len(solutes) < self.model_namespace.chemical_inputs['solute min'] or len(solutes) > self.model_namespace.chemical_inputs['solute max'] or \
-                len(solvents) < self.model_namespace.chemical_inputs['solvent min'] or len(solvents) > self.model_namespace.chemical_inputs['solvent max'] or \
-                len(components) < self.model_namespace.chemical_inputs['component min'] or len(components) > self.model_namespace.chemical_inputs['component max'] or \
-                len(solutes)+len(solvents)+len(components) < self.model_namespace.chemical_inputs['total min'] or \
-                len(solutes)+len(solvents)+len(components) > self.model_namespace.chemical_inputs['total max']:
-            return np.nan, np.nan, np.nan, 'chemical input error: mixture specification not allowed', '', '', ''
-        # add or delete hydrogens depending on model
-        if self.model_namespace.molecule_format == 'old_format':
-            solutes[0].AddHydrogens()
-        else:
-            solutes[0].DeleteHydrogens()
+        # check the persistent cache first
+        if _count_cache is not None and molecule.normsmiles != '':
+            if self.source_sha256 is None:
+                self.source_sha256 = _source_sha256(self.model_module) or ''
+            with _count_cache_lock:
+                row = None
+                if _count_cache is not None:
+                    row = _count_cache.execute('SELECT dtype, counts FROM fragment_counts WHERE model_module = ? AND version = ? '
+                                               'AND source_sha256 = ? AND normsmiles = ?',
+                                               (self.model_module, self.version, self.source_sha256, molecule.normsmiles)).fetchone()
+            if row is not None:
+                return np.frombuffer(row[1], dtype=row[0]).copy()
+        # use the view of the molecule with added or deleted hydrogens depending on model
+        explicith = self.model_namespace.molecule_format == 'old_format'
+        view = molecule.get_hydrogen_view(explicith)
         # get fragment counts for MLR
         fragment_counts = []
         if self.model_namespace.model_type == 'MLR':
@@ -245,30 +990,32 @@ class QSARModel:
                 if smarts == 'intercept':
                     fragment_counts.append(1)
                 elif smarts == 'sssr':
-                    fragment_counts.append(len(solutes[0].GetSSSR()))
+                    fragment_counts.append(len(view.GetSSSR()))
                 elif smarts == 'MW':
-                    fragment_counts.append(solutes[0].GetMolWt())
+                    fragment_counts.append(view.GetMolWt())
                 else:
-                    smarts.Match(solutes[0])
-                    fragment_counts.append(len(smarts.GetUMapList()))
+                    fragment_counts.append(len(_match_smarts(smarts, molecule, explicith)))
         # get fragment counts for MLRX
         elif self.model_namespace.model_type == 'MLRX':
-            matchedatoms = set()
+            # atoms already matched by a fragment are bits set in an integer bitmask
+            matchedatoms = 0
             for smarts in self.model_namespace.smartslist:
                 if smarts == 'intercept':
                     fragment_counts.append(1)
                 elif smarts == 'sssr':
-                    fragment_counts.append(len(solutes[0].GetSSSR()))
+                    fragment_counts.append(len(view.GetSSSR()))
                 elif smarts == 'MW':
-                    fragment_counts.append(solutes[0].GetMolWt())
+                    fragment_counts.append(view.GetMolWt())
                 else:
-                    smarts.Match(solutes[0])
-                    matchlist = smarts.GetUMapList()
+                    matchlist = _match_smarts(smarts, molecule, explicith)
                     matchcount = 0
                     for match in matchlist:
-                        if len(set(match).intersection(matchedatoms)) == 0:
+                        matchmask = 0
+                        for atom in match:
+                            matchmask |= 1 << atom
+                        if not matchmask & matchedatoms:
                             matchcount += 1
-                            matchedatoms.update(set(match))
+                            matchedatoms |= matchmask
                     fragment_counts.append(matchcount)
         # get fragment counts for MLRA
         elif self.model_namespace.model_type == 'MLRA':
@@ -276,91 +1023,132 @@ class QSARModel:
                 if smarts == 'intercept':
                     fragment_counts.append(1)
                 elif smarts == 'sssr':
-                    if len(solutes[0].GetSSSR()) > 0:
+                    if len(view.GetSSSR()) > 0:
                         fragment_counts.append(1)
                     else:
                         fragment_counts.append(0)
                 elif smarts == 'MW':
-                    fragment_counts.append(solutes[0].GetMolWt())
+                    fragment_counts.append(view.GetMolWt())
                 else:
-                    smarts.Match(solutes[0])
-                    if len(smarts.GetUMapList()) > 0:
+                    if len(_match_smarts(smarts, molecule, explicith)) > 0:
                         fragment_counts.append(1)
                     else:
                         fragment_counts.append(0)
         fragment_counts = np.array(fragment_counts)
+        # save to the persistent cache, committing in batches
+        if _count_cache is not None and molecule.normsmiles != '':
+            if self.source_sha256 is None:
+                self.source_sha256 = _source_sha256(self.model_module) or ''
+            with _count_cache_lock:
+                if _count_cache is not None:
+                    _count_cache.execute('INSERT OR REPLACE INTO fragment_counts VALUES (?, ?, ?, ?, ?, ?)',
+                                         (self.model_module, self.version, self.source_sha256, molecule.normsmiles,
+                                          fragment_counts.dtype.str, fragment_counts.tobytes()))
+                    _count_cache_pending += 1
+                    if _count_cache_pending >= 1000:
+                        _count_cache.commit()
+                        _count_cache_pending = 0
+        return fragment_counts
+
+    def apply_model(self, solutes=tuple(), solvents=tuple(), components=tuple(), solutef=tuple(), solventf=tuple(), componentf=tuple(), values=None, dependencyresults=None):
+        """Take openbabel mol in a list, apply the QSAR and return the results,
+        the applicability domain is skipped if values does not include UL, error or ULnote,
+        dependencyresults is accepted for consistency with METAQSARModel"""
+        # check if model has been loaded
+        if self.model_namespace is None:
+            self.load()
+        # first test if this molecule is stored or has been predicted before and pass those results if so
+        if solutes[0].normsmiles in self.model_namespace.stored:
+            return self.model_namespace.stored[solutes[0].normsmiles]
+        cached = _prediction_cache.get(self.model_module, solutes[0].normsmiles)
+        if cached is not None:
+            return cached
+        # assert that there is the correct number of solutes and solvents
+        # current assumption for QSARs is that only one chemical is handled at a time,
+        # designated as a solute regardless of property type
+        if not _allows_chemical_inputs(self.model_namespace.chemical_inputs, len(solutes), len(solvents), len(components)):
+            return np.nan, np.nan, np.nan, 'chemical input error: mixture specification not allowed', '', '', ''
+        # get fragment counts of the molecule
+        fragment_counts = self.get_fragment_counts(solutes[0])
         # apply multiple linear regression qsar
         if self.model_namespace.model_type in ('MLR', 'MLRX', 'MLRA'):
             # apply qsar
             prediction = (fragment_counts * self.model_namespace.coefficientarray).sum()
             error = np.nan
-            if self.model_namespace.domain:
-                # calculate CSS
-                topn = 5
-                topgroup = []
-                mintop = 0.
+            if self.model_namespace.domain and values is not None and \
+                    'UL' not in values and 'error' not in values and 'ULnote' not in values:
+                # prediction only, the training set bounds still apply to the prediction
+                # but the result is incomplete so it is not stored
+                if self.model_namespace.lower_bound and prediction < self.model_namespace.min_train:
+                    prediction = self.model_namespace.min_train
+                if self.model_namespace.upper_bound and prediction > self.model_namespace.max_train:
+                    prediction = self.model_namespace.max_train
+                post_proc_prediction, post_proc_error = self.model_namespace.post_processing(prediction, error)
+                return post_proc_prediction, np.nan, post_proc_error, '', self.model_namespace.citation, self.model_namespace.units, self.model_namespace.endpoint
+            elif self.model_namespace.domain:
+                self.load_domain()
                 if self.model_namespace.intercept:
                     ibegin = 1
                 else:
                     ibegin = 0
-                for t in range(self.model_namespace.train_counts.shape[0]):
-                    fragsim = _calculate_fragment_similarity(fragment_counts[ibegin:],
-                                                             self.model_namespace.train_counts[t, ibegin:],
-                                                             self.model_namespace.fragmentlist['fragstdev'][ibegin:],
-                                                             mintop)
-                    topgroup.append((fragsim, 1 - self.model_namespace.datalist['value_similarity'][t]))
-                    topgroup.sort(reverse=True)
-                    if len(topgroup) > topn:
-                        for i in reversed(range(topn, len(topgroup))):
-                            if topgroup[i][0] != topgroup[topn - 1][0]:
-                                topgroup.pop(i)
-                    mintop = topgroup[-1][0]
-                css = 1
-                for i in range(topn):
-                    css *= (topgroup[i][0] * (1 - topgroup[i][1])) ** 0.5
-                css = css ** (1 / float(topn))
-                # calculate leverage
-                if self.model_namespace.intercept:
-                    leverage = np.matmul(np.matmul(fragment_counts[1:], self.model_namespace.xtxi),
-                                         fragment_counts[1:].T)
-                else:
-                    leverage = np.matmul(np.matmul(fragment_counts, self.model_namespace.xtxi), fragment_counts.T)
-                # set uncertainty level and note
-                ul = 0
-                error = self.model_namespace.warn_0_error
-                note = []
-                if self.model_namespace.intercept:
-                    sumcounts = fragment_counts[1:].sum()
+                # the CSS and leverage, and the UL, error and notes that follow from them, only depend
+                # on the fragment counts so they are reused for chemicals with identical counts
+                key = fragment_counts.tobytes()
+                with self.domain_cache_lock:
+                    cacheddomain = self.domain_cache.get(key)
+                    if cacheddomain is not None:
+                        self.domain_cache.move_to_end(key)
+                if cacheddomain is not None:
+                    css, leverage, ul, error, note = cacheddomain
+                    note = list(note)
                 else:
-                    sumcounts = fragment_counts.sum()
-                if sumcounts == 0:
-                    ul = 4
-                    error = self.model_namespace.warn_4_error
-                    note.append('no fragment overlap with training dataset')
-                elif leverage >= 1:
-                    ul = 3
-                    error = self.model_namespace.warn_3_error
-                    note.append('leverage > 1')
-                elif css <= self.model_namespace.css_cutoff_1 or leverage >= self.model_namespace.leverage_cutoff_1:
-                    ul = 2
-                    error = self.model_namespace.warn_2_error
-                    if css < self.model_namespace.css_cutoff_1:
-                        note.append('out of domain')
-                    if leverage > self.model_namespace.leverage_cutoff_1:
-                        note.append('structural outlier')
-                elif css <= self.model_namespace.css_cutoff_0 or leverage >= self.model_namespace.leverage_cutoff_0:
-                    ul = 1
-                    error = self.model_namespace.warn_1_error
-                    if css < self.model_namespace.css_cutoff_0:
-                        note.append('low similarity')
-                    if leverage > self.model_namespace.leverage_cutoff_0:
-                        note.append('high leverage')
+                    # calculate CSS
+                    fragsim = _calculate_topn_fragment_similarity(fragment_counts[ibegin:],
+                                                                  self.model_namespace.train_counts.columns(ibegin),
+                                                                  self.model_namespace.fragmentlist['fragstdev'][ibegin:],
+                                                                  self.model_namespace.train_nonzero)
+                    css = _calculate_css(fragsim, self.model_namespace.value_dissimilarity)
+                    # calculate leverage
+                    leverage = self.model_namespace.leverage_factor.leverage(fragment_counts[ibegin:])
+                    # set uncertainty level and note
+                    ul = 0
+                    error = self.model_namespace.warn_0_error
+                    note = []
+                    if self.model_namespace.intercept:
+                        sumcounts = fragment_counts[1:].sum()
+                    else:
+                        sumcounts = fragment_counts.sum()
+                    if sumcounts == 0:
+                        ul = 4
+                        error = self.model_namespace.warn_4_error
+                        note.append('no fragment overlap with training dataset')
+                    elif leverage >= 1 - leverage_tolerance:
+                        ul = 3
+                        error = self.model_namespace.warn_3_error
+                        note.append('leverage > 1')
+                    elif css <= self.model_namespace.css_cutoff_1 or leverage >= self.model_namespace.leverage_cutoff_1:
+                        ul = 2
+                        error = self.model_namespace.warn_2_error
+                        if css < self.model_namespace.css_cutoff_1:
+                            note.append('out of domain')
+                        if leverage > self.model_namespace.leverage_cutoff_1:
+                            note.append('structural outlier')
+                    elif css <= self.model_namespace.css_cutoff_0 or leverage >= self.model_namespace.leverage_cutoff_0:
+                        ul = 1
+                        error = self.model_namespace.warn_1_error
+                        if css < self.model_namespace.css_cutoff_0:
+                            note.append('low similarity')
+                        if leverage > self.model_namespace.leverage_cutoff_0:
+                            note.append('high leverage')
+                    with self.domain_cache_lock:
+                        self.domain_cache[key] = (css, leverage, ul, error, tuple(note))
+                        if len(self.domain_cache) > self.domain_cache_size:
+                            self.domain_cache.popitem(last=False)
                 # negative domain check for atom type violations
+                explicith = self.model_namespace.molecule_format == 'old_format'
                 violations = []
                 for pattern1, pattern2, description in self.model_namespace.neg_dom_check_init:
-                    pattern1.Match(solutes[0])
-                    pattern2.Match(solutes[0])
-                    if len(pattern1.GetUMapList()) != len(pattern2.GetUMapList()):
+                    if len(_match_smarts(pattern1, solutes[0], explicith)) != len(_match_smarts(pattern2, solutes[0], explicith)):
                         violations.append(description)
                 if len(violations) > 0:
                     ul = 5
@@ -377,14 +1165,36 @@ class QSARModel:
                     ul = 6
                     prediction = self.model_namespace.max_train
                 post_proc_prediction, post_proc_error = self.model_namespace.post_processing(prediction, error)
-                self.model_namespace.stored[solutes[0].normsmiles] = (post_proc_prediction, ul, post_proc_error, ', '.join(note), self.model_namespace.citation, self.model_namespace.units, self.model_namespace.endpoint)
+                _prediction_cache.put(self.model_module, solutes[0].normsmiles, (post_proc_prediction, ul, post_proc_error, ', '.join(note), self.model_namespace.citation, self.model_namespace.units, self.model_namespace.endpoint))
                 return post_proc_prediction, ul, post_proc_error, ', '.join(note), self.model_namespace.citation, self.model_namespace.units, self.model_namespace.endpoint
             else:
                 post_proc_prediction, post_proc_error = self.model_namespace.post_processing(prediction, error)
-                self.model_namespace.stored[solutes[0].normsmiles] = (post_proc_prediction, np.nan, post_proc_error, '', self.model_namespace.citation, self.model_namespace.units, self.model_namespace.endpoint)
+                _prediction_cache.put(self.model_module, solutes[0].normsmiles, (post_proc_prediction, np.nan, post_proc_error, '', self.model_namespace.citation, self.model_namespace.units, self.model_namespace.endpoint))
                 return post_proc_prediction, np.nan, post_proc_error, '', self.model_namespace.citation, self.model_namespace.units, self.model_namespace.endpoint
 
 
+def get_fragment_count_matrix(qsar, molecules, converter=None):
+    """Return the fragment counts of a list of molecules for a QSAR as an array with one row per molecule.
+
+    Arguments:
+        qsar -- QSARModel with model_type MLR, MLRX or MLRA, e.g. from get_qsar_list
+        molecules -- list of IFSMols or SMILES strings, SMILES are normalized first
+        converter -- openbabel OBConversion instance passed on to SMILES normalization
+
+    The columns are in the order of the model fragment list, rows of SMILES that
+    could not be normalized are filled with NaN.
+    """
+    qsar.load()
+    counts_matrix = np.full((len(molecules), len(qsar.model_namespace.smartslist)), np.nan)
+    for i, molecule in enumerate(molecules):
+        if type(molecule) == str:
+            molecule, normsmiles, conversionnote = smiles_norm.convertsmiles(molecule, converter)
+            if normsmiles == '':
+                continue
+        counts_matrix[i] = qsar.get_fragment_counts(molecule)
+    return counts_matrix
+
+
 class METAQSARModel:
     """Class that loads a Meta QSAR, which combines data from its dependencies
     to make a new model prediction for IFSMols (subclass of openbabel mols)"""
@@ -400,6 +1210,8 @@ class METAQSARModel:
         self.version = version
         self.super_models = []
         self.default_stored = {}
+        # held while the model is loaded, model_namespace is only set once the dependencies are linked
+        self.load_lock = threading.RLock()
 
     def __str__(self):
         return self.model_name
@@ -412,34 +1224,40 @@ class METAQSARModel:
         # check if model has been linked
         if self.model_namespace is not None:
             return
-        # initiate model namespace
-        self.model_namespace = importlib.import_module(self.model_module)
-        # check if model is a mixture or not to help format outputs
-        if self.model_namespace.chemical_inputs['total min'] <= 1:
-            self.ismixture = False
-        else:
-            self.ismixture = True
-        # link models which depend on this one
-        # link solute dependencies
-        self.model_namespace.solutedependencymodels = {}
-        solutedependencies = get_qsar_list(qsarlist=self.model_namespace.solute_dependencies_list)
-        for qsar in solutedependencies:
-            self.model_namespace.solutedependencymodels[qsar.model_name] = qsar
-            self.model_namespace.solutedependencymodels[qsar.model_name].super_models.append(self)
-        # link solvent dependencies
-        self.model_namespace.solventdependencymodels = {}
-        solventdependencies = get_qsar_list(qsarlist=self.model_namespace.solvent_dependencies_list)
-        for qsar in solventdependencies:
-            self.model_namespace.solventdependencymodels[qsar.model_name] = qsar
-            self.model_namespace.solventdependencymodels[qsar.model_name].super_models.append(self)
-        # link component dependencies
-        self.model_namespace.componentdependencymodels = {}
-        componentdependencies = get_qsar_list(qsarlist=self.model_namespace.component_dependencies_list)
-        for qsar in componentdependencies:
-            self.model_namespace.componentdependencymodels[qsar.model_name] = qsar
-            self.model_namespace.componentdependencymodels[qsar.model_name].super_models.append(self)
-        # backup the stored data for reset and restore
-        self.default_stored = self.model_namespace.stored.copy()
+        with self.load_lock:
+            if self.model_namespace is not None:
+                return
+            # initiate model namespace
+            namespace = _import_model_module(self.model_module)
+            if hasattr(namespace, 'leverage_factor'):
+                _warn_illconditioned(self.model_name, namespace.leverage_factor)
+            # check if model is a mixture or not to help format outputs
+            if namespace.chemical_inputs['total min'] <= 1:
+                self.ismixture = False
+            else:
+                self.ismixture = True
+            # link models which depend on this one
+            # link solute dependencies
+            namespace.solutedependencymodels = {}
+            solutedependencies = get_qsar_list(qsarlist=namespace.solute_dependencies_list)
+            for qsar in solutedependencies:
+                namespace.solutedependencymodels[qsar.model_name] = qsar
+                namespace.solutedependencymodels[qsar.model_name].super_models.append(self)
+            # link solvent dependencies
+            namespace.solventdependencymodels = {}
+            solventdependencies = get_qsar_list(qsarlist=namespace.solvent_dependencies_list)
+            for qsar in solventdependencies:
+                namespace.solventdependencymodels[qsar.model_name] = qsar
+                namespace.solventdependencymodels[qsar.model_name].super_models.append(self)
+            # link component dependencies
+            namespace.componentdependencymodels = {}
+            componentdependencies = get_qsar_list(qsarlist=namespace.component_dependencies_list)
+            for qsar in componentdependencies:
+                namespace.componentdependencymodels[qsar.model_name] = qsar
+                namespace.componentdependencymodels[qsar.model_name].super_models.append(self)
+            # backup the stored data for reset and restore
+            self.default_stored = namespace.stored.copy()
+            self.model_namespace = namespace
 
     def set_stored(self, normsmiles, value, ul='U', error=np.nan, ulnote='user value', citation='user value', units=None, endpoint=None):
         """Add a stored value with user-entered data"""
@@ -496,6 +1314,7 @@ class METAQSARModel:
             self.load()
         if normsmiles in self.model_namespace.stored:
             self.model_namespace.stored.pop(normsmiles)
+        _prediction_cache.remove(self.model_module, normsmiles=normsmiles)
         if propagatedown:
             for qsar in self.model_namespace.solutedependencymodels.values():
                 qsar.remove_stored(normsmiles, propagatedown=propagatedown)
@@ -513,6 +1332,7 @@ class METAQSARModel:
         if self.model_namespace is None:
             self.load()
         self.model_namespace.stored = self.default_stored.copy()
+        _prediction_cache.remove(self.model_module)
         if propagatedown:
             for qsar in self.model_namespace.solutedependencymodels.values():
                 qsar.reset_stored(propagatedown=propagatedown)
@@ -549,6 +1369,7 @@ class METAQSARModel:
         for key in list(self.model_namespace.stored.keys()):
             if self.model_namespace.stored[key][1] == 'U':
                 self.model_namespace.stored.pop(key)
+        _prediction_cache.remove(self.model_module, ul='U')
         if propagatedown:
             for qsar in self.model_namespace.solutedependencymodels.values():
                 qsar.erase_user_stored(propagatedown=propagatedown)
@@ -568,6 +1389,7 @@ class METAQSARModel:
         for key in list(self.model_namespace.stored.keys()):
             if self.model_namespace.stored[key][1] == 'E':
                 self.model_namespace.stored.pop(key)
+        _prediction_cache.remove(self.model_module, ul='E')
         if propagatedown:
             for qsar in self.model_namespace.solutedependencymodels.values():
                 qsar.erase_experimental_stored(propagatedown=propagatedown)
@@ -585,6 +1407,7 @@ class METAQSARModel:
         if self.model_namespace is None:
             self.load()
         self.model_namespace.stored = {}
+        _prediction_cache.remove(self.model_module)
         if propagatedown:
             for qsar in self.model_namespace.solutedependencymodels.values():
                 qsar.erase_all_stored(propagatedown=propagatedown)
@@ -596,17 +1419,33 @@ class METAQSARModel:
             for qsar in self.super_models:
                 qsar.erase_all_stored(propagateup=propagateup)
 
-    def apply_model(self, solutes=tuple(), solvents=tuple(), components=tuple(), solutef=tuple(), solventf=tuple(), componentf=tuple()):
-        """Take openbabel mol(s) in lists of solutes and solvents, apply the Meta QSAR and return the results"""
+    def calculate_many(self, solutedependencies, propagated_domain_notes=''):
+        """Calculate the Meta QSAR for many single chemicals at once from columns of their dependency results.
+
+        solutedependencies is a dict keyed by dependency name of (values, ULs, errors) columns with one row per
+        chemical and propagated_domain_notes is a string or a column of notes. Returns the columns of predictions,
+        ULs, errors and notes and the citation, units and endpoint, with the same results as calculate for each
+        chemical. Meta QSAR modules without a calculate_many function are calculated one chemical at a time.
+        """
+        # check if model has been loaded
+        if self.model_namespace is None:
+            self.load()
+        if self.model_namespace.chemical_inputs['total max'] != 1:
+            raise RuntimeError('calculate_many is only available for Meta QSARs of single chemicals, not {}'.format(self.model_name))
+        if hasattr(self.model_namespace, 'calculate_many'):
+            return self.model_namespace.calculate_many(solutedependencies, propagated_domain_notes=propagated_domain_notes)
+        return batch.calculate_rows(self.model_namespace.calculate, solutedependencies, propagated_domain_notes) + \
+            (self.model_namespace.citation, self.model_namespace.units, self.model_namespace.endpoint)
+
+    def apply_model(self, solutes=tuple(), solvents=tuple(), components=tuple(), solutef=tuple(), solventf=tuple(), componentf=tuple(), values=None, dependencyresults=None):
+        """Take openbabel mol(s) in lists of solutes and solvents, apply the Meta QSAR and return the results,
+        values is accepted for consistency with QSARModel but the dependencies always need their full results,
+        results of dependencies already in dependencyresults (see EvaluationPlan) are not calculated again"""
         # check if model has been loaded and dependencies linked
         if self.model_namespace is None:
             self.load()
         # assert that there is the correct number of solutes and solvents
-        if len(solutes) < self.model_namespace.chemical_inputs['solute min'] or len(solutes) > self.model_namespace.chemical_inputs['solute max'] or \
-                len(solvents) < self.model_namespace.chemical_inputs['solvent min'] or len(solvents) > self.model_namespace.chemical_inputs['solvent max'] or \
-                len(components) < self.model_namespace.chemical_inputs['component min'] or len(components) > self.model_namespace.chemical_inputs['component max'] or \
-                len(solutes)+len(solvents)+len(components) < self.model_namespace.chemical_inputs['total min'] or \
-                len(solutes)+len(solvents)+len(components) > self.model_namespace.chemical_inputs['total max']:
+        if not _allows_chemical_inputs(self.model_namespace.chemical_inputs, len(solutes), len(solvents), len(components)):
             if self.model_namespace.chemical_inputs['total max'] == 1:
                 return np.nan, np.nan, np.nan, 'chemical input error: mixture specification not allowed', '', '', ''
             elif self.model_namespace.chemical_inputs['total max'] == 2 and \
@@ -621,6 +1460,11 @@ class METAQSARModel:
         # check if a value is stored for this solute
         if self.model_namespace.chemical_inputs['total max'] == 1 and solutes[0].normsmiles in self.model_namespace.stored:
             return self.model_namespace.stored[solutes[0].normsmiles]
+        # check if this solute has been predicted before
+        if self.model_namespace.chemical_inputs['total max'] == 1:
+            cached = _prediction_cache.get(self.model_module, solutes[0].normsmiles)
+            if cached is not None:
+                return cached
         # # check if a value is stored for this solute/solvent pair
         # elif self.model_namespace.chemical_inputs['total max'] == 2 and \
         #         self.model_namespace.chemical_inputs['solute min'] == 1 and \
@@ -654,19 +1498,28 @@ class METAQSARModel:
         for s in range(len(solutes)):
             solutedependencies.append({})
             for d, m in self.model_namespace.solutedependencymodels.items():
-                solutedependencies[-1][d] = tuple(m.apply_model(solutes=(solutes[s],), solutef=(solutef[s],)))
+                if dependencyresults is not None and (m, id(solutes[s])) in dependencyresults:
+                    solutedependencies[-1][d] = dependencyresults[(m, id(solutes[s]))]
+                else:
+                    solutedependencies[-1][d] = tuple(m.apply_model(solutes=(solutes[s],), solutef=(solutef[s],)))
         # pass solvents to solvent dependency qsar models to calculate values
         solventdependencies = []
         for s in range(len(solvents)):
             solventdependencies.append({})
             for d, m in self.model_namespace.solventdependencymodels.items():
-                solventdependencies[-1][d] = tuple(m.apply_model(solutes=(solvents[s],), solutef=(solventf[s],)))
+                if dependencyresults is not None and (m, id(solvents[s])) in dependencyresults:
+                    solventdependencies[-1][d] = dependencyresults[(m, id(solvents[s]))]
+                else:
+                    solventdependencies[-1][d] = tuple(m.apply_model(solutes=(solvents[s],), solutef=(solventf[s],)))
         # pass components to component dependency qsar models to calculate values
         componentdependencies = []
         for c in range(len(components)):
             componentdependencies.append({})
             for d, m in self.model_namespace.componentdependencymodels.items():
-                componentdependencies[-1][d] = tuple(m.apply_model(solutes=(components[c],), solutef=(componentf[c],)))
+                if dependencyresults is not None and (m, id(components[c])) in dependencyresults:
+                    componentdependencies[-1][d] = dependencyresults[(m, id(components[c]))]
+                else:
+                    componentdependencies[-1][d] = tuple(m.apply_model(solutes=(components[c],), solutef=(componentf[c],)))
         # generate propagated domain notes for solutes
         propagated_domain_notes = []
         for s in range(len(solutes)):
@@ -695,12 +1548,12 @@ class METAQSARModel:
                 domainnotes.append(''.join([k, '=', str(solventdependencies[s][k][1])]))
             if len(domainnotes):
                 propagated_domain_notes.append(''.join(['solvent {} dependency ULs: '.format(s+1), ', '.join(domainnotes)]))
-        self.model_namespace.propagated_domain_notes = '; '.join(propagated_domain_notes)
-        # call the metamodel with the dependency outputs to calculate meta result
-        prediction, UL, error, ULnote, citation, units, endpoint = self.model_namespace.calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf)
-        # store result for this solute
+        # call the metamodel with the dependency outputs and notes to calculate meta result
+        prediction, UL, error, ULnote, citation, units, endpoint = self.model_namespace.calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf,
+                                                                                                 propagated_domain_notes='; '.join(propagated_domain_notes))
+        # cache result for this solute
         if self.model_namespace.chemical_inputs['total max'] == 1:
-            self.set_stored(solutes[0].normsmiles, prediction, UL, error, ULnote, citation, units, endpoint)
+            _prediction_cache.put(self.model_module, solutes[0].normsmiles, (prediction, UL, error, ULnote, citation, units, endpoint))
         # # store result for this solute/solvent pair
         # elif self.model_namespace.chemical_inputs['total max'] == 2 and \
         #         self.model_namespace.chemical_inputs['solute min'] == 1 and \
@@ -731,6 +1584,110 @@ class METAQSARModel:
         return prediction, UL, error, ULnote, citation, units, endpoint
 
 
+class EvaluationPlan:
+    """Dependency graph of a list of QSARs that applies every model in the graph once per molecule.
+
+    The models are ordered so that dependencies come before the Meta QSARs that use them. The results
+    for each molecule are kept in a table that is handed to the Meta QSARs, instead of every Meta QSAR
+    applying all of its dependencies again.
+    """
+
+    def __init__(self, qsarlist):
+        """Load the QSARs and their dependencies and sort them in dependency order"""
+        self.qsarlist = list(qsarlist)
+        self.order = []
+        # models used by other models always need their full results, including the applicability domain
+        self.dependencies = set()
+        for qsar in self.qsarlist:
+            self._add_to_order(qsar, [])
+
+    def _add_to_order(self, qsar, path):
+        """Add a model to the order after all of its dependencies (depth first)"""
+        if qsar in self.order:
+            return
+        if qsar in path:
+            raise RuntimeError('Circular dependency between QSARs: {}'.format(' -> '.join(str(q) for q in path + [qsar])))
+        qsar.load()
+        if isinstance(qsar, METAQSARModel):
+            for dependencymodels in (qsar.model_namespace.solutedependencymodels,
+                                     qsar.model_namespace.solventdependencymodels,
+                                     qsar.model_namespace.componentdependencymodels):
+                for m in dependencymodels.values():
+                    self.dependencies.add(m)
+                    self._add_to_order(m, path + [qsar])
+        self.order.append(qsar)
+
+    def _require(self, qsar, molecule, f, needed):
+        """Add a single chemical and the dependencies that will be applied to it to the models that are needed"""
+        if any(m is molecule for m, mf in needed.setdefault(qsar, [])):
+            return
+        needed[qsar].append((molecule, f))
+        if isinstance(qsar, METAQSARModel) and _allows_chemical_inputs(qsar.model_namespace.chemical_inputs, 1, 0, 0):
+            for m in qsar.model_namespace.solutedependencymodels.values():
+                self._require(m, molecule, f, needed)
+
+    def apply(self, solutes=tuple(), solvents=tuple(), components=tuple(), solutef=tuple(), solventf=tuple(), componentf=tuple(), values=None):
+        """Apply the QSARs to the chemical input like apply_model, returns a dict of the result of each QSAR in the list"""
+        singlechemical = len(solutes) == 1 and len(solvents) == 0 and len(components) == 0
+        # find the molecules each model is applied to
+        needed = {}
+        for qsar in self.qsarlist:
+            if singlechemical:
+                self._require(qsar, solutes[0], solutef[0], needed)
+            elif isinstance(qsar, METAQSARModel) and \
+                    _allows_chemical_inputs(qsar.model_namespace.chemical_inputs, len(solutes), len(solvents), len(components)):
+                for s in range(len(solutes)):
+                    for m in qsar.model_namespace.solutedependencymodels.values():
+                        self._require(m, solutes[s], solutef[s], needed)
+                for s in range(len(solvents)):
+                    for m in qsar.model_namespace.solventdependencymodels.values():
+                        self._require(m, solvents[s], solventf[s], needed)
+                for c in range(len(components)):
+                    for m in qsar.model_namespace.componentdependencymodels.values():
+                        self._require(m, components[c], componentf[c], needed)
+        # apply each model once per molecule in dependency order
+        table = {}
+        for qsar in self.order:
+            if qsar in self.dependencies:
+                qsarvalues = None
+            else:
+                qsarvalues = values
+            for molecule, f in needed.get(qsar, []):
+                table[(qsar, id(molecule))] = tuple(qsar.apply_model(solutes=(molecule,), solutef=(f,), values=qsarvalues,
+                                                                     dependencyresults=table))
+        results = {}
+        for qsar in self.qsarlist:
+            if singlechemical:
+                results[qsar] = table[(qsar, id(solutes[0]))]
+            else:
+                results[qsar] = tuple(qsar.apply_model(solutes=solutes, solvents=solvents, components=components,
+                                                       solutef=solutef, solventf=solventf, componentf=componentf,
+                                                       values=values, dependencyresults=table))
+        return results
+
+
+# least recently used cache of the evaluation plans of QSAR lists, see get_evaluation_plan
+_evaluation_plans = collections.OrderedDict()
+_evaluation_plans_size = 64
+_evaluation_plans_lock = threading.Lock()
+
+
+def get_evaluation_plan(qsarlist):
+    """Return the EvaluationPlan of a list of QSARs, plans of the most recently used lists are kept and reused"""
+    key = tuple(qsarlist)
+    with _evaluation_plans_lock:
+        plan = _evaluation_plans.get(key)
+        if plan is not None:
+            _evaluation_plans.move_to_end(key)
+            return plan
+    plan = EvaluationPlan(qsarlist)
+    with _evaluation_plans_lock:
+        _evaluation_plans[key] = plan
+        if len(_evaluation_plans) > _evaluation_plans_size:
+            _evaluation_plans.popitem(last=False)
+    return plan
+
+
 # instantiate qsar models
 fhlb = QSARModel('ifsqsar.models.ifs_qsar_fhlb_linr', 'fhlb', 1)
 hhlb = QSARModel('ifsqsar.models.ifs_qsar_hhlb_linr', 'hhlb', 1)
@@ -871,3 +1828,100 @@ def get_qsar_list(qsarlist=None, versionlist=None):
 
     return returnlist
 
+
+def _namespace_nbytes(namespace):
+    """Return the number of bytes of the arrays held in a model namespace"""
+    nbytes = 0
+    for value in vars(namespace).values():
+        if isinstance(value, np.ndarray):
+            nbytes += value.nbytes
+        elif isinstance(value, _SparseCounts):
+            nbytes += value.indptr.nbytes + value.indices.nbytes + value.data.nbytes
+        elif isinstance(value, LeverageFactor):
+            nbytes += value.rinv.nbytes
+    return nbytes
+
+
+def _warmup_domain(qsar):
+    """Prepare the applicability domain of a loaded model and read its memory-mapped arrays, returns the time taken"""
+    start = time.perf_counter()
+    if isinstance(qsar, QSARModel):
+        qsar.load_domain()
+        # the fragment standard deviations are read for every domain calculation
+        if qsar.model_namespace.domain:
+            qsar.model_namespace.fragmentlist
+    for value in vars(qsar.model_namespace).values():
+        if isinstance(value, np.memmap) and value.size > 0:
+            np.frombuffer(value, dtype=np.uint8).max()
+    return time.perf_counter() - start
+
+
+def warmup(qsarlist=None, workers=1):
+    """Load QSARs and every model they depend on so that the first prediction does not pay the load costs.
+
+    Arguments:
+        qsarlist -- list of QSARs from get_qsar_list, default is the full default list
+        workers -- number of processes that compile model module sources, and of threads that
+            prepare applicability domains, in parallel
+
+    Every model is loaded with its SMARTS, its applicability domain is prepared and memory-mapped
+    arrays are read once. Returns a list of dicts in load order, one per model, with keys name,
+    module, seconds (load time) and nbytes (memory of the arrays held by the model). The first
+    entry is openbabel, which initializes its data when the first SMILES is normalized.
+    The load order and the linking of Meta QSARs do not depend on the number of workers.
+    """
+    if qsarlist is None:
+        qsarlist = get_qsar_list()
+    report = []
+    start = time.perf_counter()
+    smiles_norm.convertsmiles('CCO')[0].get_hydrogen_view(True)
+    report.append({'name': 'openbabel', 'module': 'openbabel', 'seconds': time.perf_counter() - start, 'nbytes': 0})
+    loaded = []
+    seconds = {}
+    processpool = None
+    if workers > 1:
+        processpool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    try:
+        # breadth first through the dependencies, which are only known once a Meta QSAR is loaded
+        pending = list(qsarlist)
+        while len(pending) > 0:
+            level = []
+            for qsar in pending:
+                if qsar not in loaded and qsar not in level:
+                    level.append(qsar)
+            pending = []
+            # compiling the sources of model modules without artifacts is most of the load time
+            # and independent for each module, so it is done in parallel processes
+            compiled = {}
+            if processpool is not None:
+                compilelist = []
+                for qsar in level:
+                    if qsar.model_namespace is None and qsar.model_module not in sys.modules and \
+                            qsar.model_module not in compilelist and _current_artifacts(qsar.model_module)[0] is None and \
+                            _source_sha256(qsar.model_module) is not None:
+                        compilelist.append(qsar.model_module)
+                compiled = dict(zip(compilelist, processpool.map(_compile_model_source, compilelist)))
+            # models are loaded in order, so Meta QSARs are always linked to their dependencies in the same order
+            for qsar in level:
+                start = time.perf_counter()
+                if qsar.model_module in compiled:
+                    code, compileseconds = compiled.pop(qsar.model_module)
+                    _import_model_module(qsar.model_module, code)
+                    start -= compileseconds
+                qsar.load()
+                seconds[qsar] = time.perf_counter() - start
+                if isinstance(qsar, METAQSARModel):
+                    for dependencymodels in (qsar.model_namespace.solutedependencymodels,
+                                             qsar.model_namespace.solventdependencymodels,
+                                             qsar.model_namespace.componentdependencymodels):
+                        pending.extend(dependencymodels.values())
+            loaded.extend(level)
+    finally:
+        if processpool is not None:
+            processpool.shutdown()
+    # the linear algebra of the applicability domains releases the GIL so threads are enough
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as threadpool:
+        for qsar, domainseconds in zip(loaded, threadpool.map(_warmup_domain, loaded)):
+            report.append({'name': qsar.model_name, 'module': qsar.model_module,
+                           'seconds': seconds[qsar] + domainseconds, 'nbytes': _namespace_nbytes(qsar.model_namespace)})
+    return report
@@ -0,0 +1,47 @@
+"""
+ifsqsar/models/batch.py
+developed by Trevor N. Brown
+Array versions of the operations of the Meta QSAR calculate functions, used by the calculate_many functions
+that apply a Meta QSAR to columns of dependency results for many chemicals at once
+"""
+
+import numpy as np
+
+
+def full(value, n):
+    """Return a column of n copies of a value, or a copy of the value as a column if it is one already"""
+    column = np.empty(n, dtype=object)
+    if np.ndim(value) == 0:
+        column[:] = [value] * n
+    else:
+        column[:] = list(value)
+    return column
+
+
+def calculate_rows(calculate, solutedependencies, propagated_domain_notes='', rows=None):
+    """Apply the scalar calculate function of a Meta QSAR to rows (all by default) of columns of solute
+    dependency results, returns the predictions, ULs, errors and notes of the rows as columns"""
+    n = len(next(iter(solutedependencies.values()))[0])
+    if rows is None:
+        rows = np.arange(n)
+    notes = full(propagated_domain_notes, n)
+    columns = dict((d, [np.asarray(solutedependencies[d][0], dtype=float),
+                        np.asarray(solutedependencies[d][1], dtype=object),
+                        np.asarray(solutedependencies[d][2], dtype=float)]) for d in solutedependencies)
+    results = [], [], [], []
+    for i in rows:
+        dependencies = dict((d, (columns[d][0][i], columns[d][1][i], columns[d][2][i])) for d in columns)
+        result = calculate([dependencies], [], [], [('u', '1')], [], [], propagated_domain_notes=notes[i])
+        for r in range(4):
+            results[r].append(result[r])
+    return np.array(results[0], dtype=float), full(results[1], len(rows)), np.array(results[2], dtype=float), full(results[3], len(rows))
+
+
+def join_notes(separator, first, second):
+    """Join two columns (or a column and a string) of notes with a separator like separator.join([first, second])"""
+    return np.char.add(np.char.add(np.asarray(first, dtype=str), separator), np.asarray(second, dtype=str)).astype(object)
+
+
+def round_column(values, digits):
+    """Round a column of values like round() of numpy float64 scalars"""
+    return np.round(np.asarray(values, dtype=float), digits)
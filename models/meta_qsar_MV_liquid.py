@@ -1,5 +1,6 @@
 """Clone of QSPR for Molar Volume of liquids (MVliquid)"""
 import numpy as np
+from . import batch
 value_names = ('MVliquid',)
 version = 1
 endpoint = 'Molar volume of liquid'
@@ -15,14 +16,22 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['MVsolid', 'MVliqcorr']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {'O': (round(18.01528, round_digits), 'E', np.nan, 'experimental value used', 'well known value', units, endpoint)}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     # Apply solid -> liquid correction defined in Kotomin and Kozolov 2006
     MV = solutedependencies[0]['MVsolid'][0] * solutedependencies[0]['MVliqcorr'][0]
 
     return round(MV, round_digits), np.nan, round(0, round_digits), propagated_domain_notes, citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    MVsolid, MVliqcorr = [np.asarray(solutedependencies[d][0], dtype=float) for d in ['MVsolid', 'MVliqcorr']]
+    # Apply solid -> liquid correction defined in Kotomin and Kozolov 2006
+    MV = MVsolid * MVliqcorr
+
+    return batch.round_column(MV, round_digits), batch.full(np.nan, len(MV)), np.full(len(MV), round(0, round_digits)), batch.full(propagated_domain_notes, len(MV)), citation, units, endpoint
@@ -1,5 +1,6 @@
 """Clone of QSPR for Molar Volume of solids (MVsolid)"""
 import numpy as np
+from . import batch
 value_names = ('MVsolid',)
 version = 1
 endpoint = 'Molar volume of solid'
@@ -15,12 +16,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['MVmlrx', 'MVmlr', 'MVmlrRings', 'MW']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     # Sum the different fragment types defined in Kotomin and Kozolov 2006
     MV = solutedependencies[0]['MVmlrx'][0] + solutedependencies[0]['MVmlr'][0] + solutedependencies[0]['MVmlrRings'][0]
     # if there are no fragments output MV corrected to get liquid density of methane
@@ -28,3 +28,13 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
         MV = (solutedependencies[0]['MW'][0] / 0.4228) * (0.371/0.4228)
     return round(MV, round_digits), np.nan, round(0, round_digits), propagated_domain_notes, citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    MVmlrx, MVmlr, MVmlrRings, MW = [np.asarray(solutedependencies[d][0], dtype=float) for d in ['MVmlrx', 'MVmlr', 'MVmlrRings', 'MW']]
+    # Sum the different fragment types defined in Kotomin and Kozolov 2006
+    MV = MVmlrx + MVmlr + MVmlrRings
+    # if there are no fragments output MV corrected to get liquid density of methane
+    MV = np.where(MV == 0, (MW / 0.4228) * (0.371/0.4228), MV)
+    return batch.round_column(MV, round_digits), batch.full(np.nan, len(MV)), np.full(len(MV), round(0, round_digits)), batch.full(propagated_domain_notes, len(MV)), citation, units, endpoint
@@ -15,12 +15,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['MVliquid']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     # Apply solid -> liquid correction defined in Kotomin and Kozolov 2006
     MV = solutedependencies[0]['MVliquid'][0] * 0.962
 
@@ -1,5 +1,6 @@
 """Clone of QSPR for density of liquids (densityliquid)"""
 import numpy
+from . import batch
 value_names = ('densityliquid',)
 version = 1
 endpoint = 'Density of pure liquid'
@@ -15,13 +16,21 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['MVliquid', 'MW']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     density = solutedependencies[0]['MW'][0] / solutedependencies[0]['MVliquid'][0]
 
     return round(density, round_digits), numpy.nan, round(0, round_digits), propagated_domain_notes, citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    MVliquid, MW = [numpy.asarray(solutedependencies[d][0], dtype=float) for d in ['MVliquid', 'MW']]
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        density = MW / MVliquid
+
+    return batch.round_column(density, round_digits), batch.full(numpy.nan, len(density)), numpy.full(len(density), round(0, round_digits)), batch.full(propagated_domain_notes, len(density)), citation, units, endpoint
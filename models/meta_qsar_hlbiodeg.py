@@ -1,5 +1,6 @@
 """Extrapolation of biodegradation half-life (HLbiodeg) from approximate clones of QSRPs (BIOWIN3, BIOWIN4)"""
 import numpy as np
+from . import batch
 value_names = ('HLbiodeg',)
 version = 1
 endpoint = 'Biodegradation half-life in water (20-25degC)'
@@ -20,12 +21,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['biowin3usmmlrx', 'biowin3usmmlra', 'biowin4psmmlrx', 'biowin4psmmlra']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     domainnotes = 'generic error estimated from uncertainties of model fits'
     # estimate HLbiodeg from both biowin survey models and take the average
     biowin3 = solutedependencies[0]['biowin3usmmlrx'][0] + solutedependencies[0]['biowin3usmmlra'][0]
@@ -34,3 +34,17 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
 
     return round(24*10**HLbiodeg, round_digits), np.nan, round(10**(1.11*1.96), round_digits), domainnotes, citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    n = len(solutedependencies['biowin3usmmlrx'][0])
+    biowin3usmmlrx, biowin3usmmlra, biowin4psmmlrx, biowin4psmmlra = \
+        [np.asarray(solutedependencies[d][0], dtype=float) for d in ['biowin3usmmlrx', 'biowin3usmmlra', 'biowin4psmmlrx', 'biowin4psmmlra']]
+    # estimate HLbiodeg from both biowin survey models and take the average
+    biowin3 = biowin3usmmlrx + biowin3usmmlra
+    biowin4 = biowin4psmmlrx + biowin4psmmlra
+    HLbiodeg = ((biowin3 * -1.07 + 4.2) + (biowin4 * -1.46 + 6.51)) / 2
+
+    return batch.round_column(24*10**HLbiodeg, round_digits), batch.full(np.nan, n), np.full(n, round(10**(1.11*1.96), round_digits)), \
+        batch.full('generic error estimated from uncertainties of model fits', n), citation, units, endpoint
@@ -1,5 +1,7 @@
 """Meta QSAR for logSoliquid (wet solvent)"""
 import numpy as np
+from . import batch
+from . import uncertainty
 value_names = ('logSowetliquid',)
 version = 1
 endpoint = 'Log of solubility in wet octanol for liquid or super-cooled liquid solute'
@@ -21,12 +23,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['S', 'A', 'B', 'V', 'L', 'MVliquid']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     domainnotes = [propagated_domain_notes]
     phaseerrorscaling = 1
     # calculate AB and ABerr
@@ -120,3 +121,43 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
         logSoUL = 6
     return round(logSo, round_digits), logSoUL, round(phaseerrorscaling * logSoerr, round_digits), '; '.join(domainnotes), citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    S, A, B, V, L, MV = [np.asarray(solutedependencies[sltdes][0], dtype=float) for sltdes in ['S', 'A', 'B', 'V', 'L', 'MVliquid']]
+    Serr, Aerr, Berr, Lerr = [np.asarray(solutedependencies[sltdes][2], dtype=float) for sltdes in ['S', 'A', 'B', 'L']]
+    phaseerrorscaling = 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # calculate AB and ABerr
+        AB = np.sqrt(A * B)
+        ABerr = A * B * np.sqrt((Aerr/A)**2 + (Berr/B)**2)
+        ABerr = np.where((A > 0) & (B > 0), AB * 0.5 * ABerr / (A * B), 0)
+        # calculate logSo with pplfer equation from Brown et al. 2023
+        logSo = - 0.65 * S \
+                + 2.67 * A \
+                + 0.66 * B \
+                - 1.60 * AB \
+                - 1.08 * V \
+                + 0.28 * L \
+                + 0.59
+        # calculate err
+        logSoerr = (V * 0.18)**2 + \
+                   (L * 0.28)**2 * ((Lerr / L)**2 + (0.04 / 0.28)**2) + \
+                   0.08**2
+        logSoerr = np.where(S != 0, logSoerr + (S * -0.86)**2 * ((Serr / S)**2 + (0.12 / -0.65)**2), logSoerr)
+        logSoerr = np.where(A != 0, logSoerr + (A * 2.64)**2 * ((Aerr / A)**2 + (0.23 / 2.67)**2), logSoerr)
+        logSoerr = np.where(B != 0, logSoerr + (B * 0.10)**2 * ((Berr / B)**2 + (0.13 / 0.66)**2), logSoerr)
+        logSoerr = np.where(AB != 0, logSoerr + (AB * -1.60)**2 * ((ABerr / AB)**2 + (0.27 / -1.60)**2), logSoerr)
+    logSoerr = np.sqrt(logSoerr)
+    logSoUL, domainnotes, errorscale = uncertainty.solute_descriptor_ul(dict((sltdes, solutedependencies[sltdes][1]) for sltdes in ['S', 'A', 'B', 'L']))
+    logSoerr *= errorscale
+    domainnotes = batch.join_notes('; ', propagated_domain_notes, domainnotes)
+    # cap So at the inverse of solute MV
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logSomax = np.log10(1000 / MV)
+    for i in np.nonzero(logSo > logSomax)[0]:
+        domainnotes[i] = '; '.join(['Predicted wet octanol solubility ({}) capped at inverse of molar volume, UL set to 6; original aggregate UL: {}'.format(round(logSo[i], round_digits), logSoUL[i]), domainnotes[i]])
+        logSo[i] = logSomax[i]
+        logSoUL[i] = 6
+    return batch.round_column(logSo, round_digits), logSoUL, batch.round_column(phaseerrorscaling * logSoerr, round_digits), domainnotes, citation, units, endpoint
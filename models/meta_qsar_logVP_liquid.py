@@ -1,5 +1,7 @@
 """Meta QSAR for logVPliquid"""
 import numpy as np
+from . import LeverageFactor
+from . import uncertainty
 value_names = ('logVPliquid',)
 version = 1
 endpoint = 'Log of vapor pressure of liquid'
@@ -16,7 +18,6 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['E', 'S', 'A', 'B', 'V', 'L', 's', 'a', 'b', 'v', 'l', 'c', 'state', 'MVliquid']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 emptrainset = np.array([[0, 0, 0, 0, 2.363, 7.714],
@@ -86,69 +87,12 @@ emptrainset = np.array([[0, 0, 0, 0, 2.363, 7.714],
                         [0.47, 1.31, 0.64, 0.57, 0.365, 2.447],
                         [0.4, 0.9, 0.58, 0.78, 0.5078, 2.661]
                         ], dtype=float)
-xtxi = np.linalg.inv(np.matmul(emptrainset.T, emptrainset))
+leverage_factor = LeverageFactor(emptrainset)
 
 stored = {}
 
 
-def aggregateUL(ULlist, roundup=False):
-    ise = False
-    isu = False
-    is5 = False
-    numul = None
-    numcount = 0
-    for UL in ULlist:
-        if type(UL) is str:
-            if UL == 'E':
-                ise = True
-            elif UL == 'U':
-                isu = True
-            elif UL == 'EU':
-                ise = True
-                isu = True
-            else:
-                if 'E' in UL:
-                    ise = True
-                if 'U' in UL:
-                    isu = True
-                if UL.replace('E', '').replace('U', '') == '5':
-                    is5 = True
-                if numul is None:
-                    numul = float(UL.replace('E', '').replace('U', ''))**2
-                else:
-                    numul += float(UL.replace('E', '').replace('U', ''))**2
-                numcount += 1
-        else:
-            if UL == 5:
-                is5 = True
-            if numul is None:
-                numul = UL**2
-            else:
-                numul += UL**2
-            numcount += 1
-    ulconcat = []
-    if ise:
-        ulconcat.append('E')
-    if isu:
-        ulconcat.append('U')
-    if numul is not None:
-        if is5:
-            ULtot = 5
-        elif roundup:
-            ULtot = int(np.ceil((numul/numcount)**0.5))
-        else:
-            ULtot = (numul/numcount)**0.5
-    else:
-        ULtot = None
-    if len(ulconcat) and ULtot is not None:
-        ulconcat.append(str(ULtot))
-        ULtot = ''.join(ulconcat)
-    elif len(ulconcat) and ULtot is None:
-        ULtot = ''.join(ulconcat)
-    return ULtot
-
-
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     # determine if the solvent is a liquid
     domainnotes = [propagated_domain_notes]
     # calculate leverage of the solvent vs. the empirical correlations training dataset
@@ -158,7 +102,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
                   solutedependencies[0]['B'][0],
                   solutedependencies[0]['V'][0],
                   solutedependencies[0]['L'][0]])
-    leverage = np.matmul(np.matmul(x, xtxi), x.T)
+    leverage = leverage_factor.leverage(x)
     if leverage < 1.5 * 6 / 66:
         ULemptra = 0
     elif leverage < 3 * 6 / 66:
@@ -171,35 +115,19 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
     # calculate aggregate UL of solute descriptors
     ULlist = []
     for sltdes in ['S', 'A', 'B', 'L']:
-        if solutedependencies[0][sltdes][1] in ['E', 'U']:
-            ULlist.append(solutedependencies[0][sltdes][1])
-        elif solutedependencies[0][sltdes][1] < 4:
-            ULlist.append(solutedependencies[0][sltdes][1])
-        elif solutedependencies[0][sltdes][1] == 4 and sltdes != 'L':
-            ULlist.append(1)
-        elif solutedependencies[0][sltdes][1] == 4 and sltdes == 'L':
-            ULlist.append(2)
-        elif solutedependencies[0][sltdes][1] == 5:
-            ULlist.append(5)
-        elif solutedependencies[0][sltdes][1] == 6:
-            ULlist.append(3)
-    ULslt = aggregateUL(ULlist)
+        if sltdes != 'L':
+            ULlist.append(uncertainty.descriptor_level(solutedependencies[0][sltdes][1], four=1))
+        else:
+            ULlist.append(uncertainty.descriptor_level(solutedependencies[0][sltdes][1], four=2))
+    ULslt = uncertainty.aggregate(ULlist)
     # calculate aggregate UL of system parameters from QSPRs
     ULlist = []
     for slvpar in ['s', 'a', 'b', 'v', 'l', 'c']:
-        if solutedependencies[0][slvpar][1] in ['E', 'U']:
-            ULlist.append(solutedependencies[0][slvpar][1])
-        elif solutedependencies[0][slvpar][1] < 4:
-            ULlist.append(solutedependencies[0][slvpar][1])
-        elif solutedependencies[0][slvpar][1] == 4 and slvpar in ['s', 'a', 'b']:
-            ULlist.append(1)
-        elif solutedependencies[0][slvpar][1] == 4 and slvpar in ['v', 'l', 'c']:
-            ULlist.append(2)
-        elif solutedependencies[0][slvpar][1] == 5:
-            ULlist.append(5)
-        elif solutedependencies[0][slvpar][1] == 6:
-            ULlist.append(3)
-    ULslvqspr = aggregateUL(ULlist)
+        if slvpar in ['s', 'a', 'b']:
+            ULlist.append(uncertainty.descriptor_level(solutedependencies[0][slvpar][1], four=1))
+        else:
+            ULlist.append(uncertainty.descriptor_level(solutedependencies[0][slvpar][1], four=2))
+    ULslvqspr = uncertainty.aggregate(ULlist)
     # calculate relative solute descriptors, UL and error
     # Vri
     Vri = 1 / solutedependencies[0]['V'][0]
@@ -207,47 +135,27 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
     Ver = 0
     # Eri
     Eri = Vri * solutedependencies[0]['E'][0]
-    Eul = solutedependencies[0]['E'][1]
-    if Eul == 4:
-        Eul = 1
-    elif Eul == 6:
-        Eul = 3
+    Eul = uncertainty.descriptor_level(solutedependencies[0]['E'][1])
     Eer = Vri * solutedependencies[0]['E'][2]
     # Sri
     Sri = Vri * solutedependencies[0]['S'][0]
-    Sul = solutedependencies[0]['S'][1]
-    if Sul == 4:
-        Sul = 1
-    elif Sul == 6:
-        Sul = 3
+    Sul = uncertainty.descriptor_level(solutedependencies[0]['S'][1])
     Ser = Vri * solutedependencies[0]['S'][2]
     # Ari
     Ari = Vri * solutedependencies[0]['A'][0]
-    Aul = solutedependencies[0]['A'][1]
-    if Aul == 4:
-        Aul = 1
-    elif Aul == 6:
-        Aul = 3
+    Aul = uncertainty.descriptor_level(solutedependencies[0]['A'][1])
     Aer = Vri * solutedependencies[0]['A'][2]
     # Bri
     Bri = Vri * solutedependencies[0]['B'][0]
-    Bul = solutedependencies[0]['B'][1]
-    if Bul == 4:
-        Bul = 1
-    elif Bul == 6:
-        Bul = 3
+    Bul = uncertainty.descriptor_level(solutedependencies[0]['B'][1])
     Ber = Vri * solutedependencies[0]['B'][2]
     # Lri
     Lri = Vri * solutedependencies[0]['L'][0]
-    Lul = solutedependencies[0]['L'][1]
-    if Lul == 4:
-        Lul = 1
-    elif Lul == 6:
-        Lul = 3
+    Lul = uncertainty.descriptor_level(solutedependencies[0]['L'][1])
     Ler = Vri * solutedependencies[0]['L'][2]
     # IAB
     IAB = (Ari * Bri)**0.5
-    IABul = aggregateUL([Aul, Bul])
+    IABul = uncertainty.aggregate([Aul, Bul])
     IABer = 0
     if IAB > 0:
         IABer = Ari * Bri * ((Aer/Ari)**2 + (Ber/Bri)**2)**0.5
@@ -261,7 +169,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
     if Eri <= 0 and Sri <= 0:
         semp = 0
         if type(Eul) is str or type(Sul) is str:
-            sempul = aggregateUL([Eul, Sul])
+            sempul = uncertainty.aggregate([Eul, Sul])
         elif Eul == 5 or Sul == 5:
             sempul = 5
         else:
@@ -270,7 +178,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
     elif Eri <= 0.15 and Sri <= 0.15:
         semp = 0.16
         if type(Eul) is str or type(Sul) is str:
-            sempul = aggregateUL([Eul, Sul])
+            sempul = uncertainty.aggregate([Eul, Sul])
         elif Eul == 5 or Sul == 5:
             sempul = 5
         else:
@@ -278,7 +186,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
         semperr = semp / 1.96
     else:
         semp = 1.327 * Sri - 0.405 * Vri - 0.239 * Lri - 0.507 * IAB + 1.871
-        sempul = aggregateUL([Sul, Lul, IABul])
+        sempul = uncertainty.aggregate([Sul, Lul, IABul])
         if semp < 0:
             semp = 0
             if sempul not in [5, 'E5', 'U5', 'EU5']:
@@ -310,7 +218,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
         aemperr = aemp / 1.96
     else:
         aemp = 2.845 * Bri + 0.421 * IAB - 1.582 * Sri + 0.607 * Lri
-        aempul = aggregateUL([Bul, IABul, Sul, Lul])
+        aempul = uncertainty.aggregate([Bul, IABul, Sul, Lul])
         if aemp < 0:
             aemp = 0
             if aempul not in [5, 'E5', 'U5', 'EU5']:
@@ -335,7 +243,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
         bemperr = 0
     else:
         bemp = 0.747 * Ari + 0.378 * IAB - 0.228 * Sri + 0.312 * Vri
-        bempul = aggregateUL([Aul, IABul, Sul])
+        bempul = uncertainty.aggregate([Aul, IABul, Sul])
         bemperr = 0.312**2 * Vri**2 * 0.007**2
         if bemp < 0:
             bemp = 0
@@ -350,7 +258,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
         bemperr = bemperr ** 0.5
     # v emp
     vemp = -0.583 * Eri - 0.279 * Sri + 0.980 * IVL - 0.918 * IAB - 0.451
-    vempul = aggregateUL([Eul, Sul, IVLul, IABul])
+    vempul = uncertainty.aggregate([Eul, Sul, IVLul, IABul])
     vemperr = (0.980 * IVL)**2 * ((0.012 / 0.980)**2 + (IVLer / IVL)**2) + 0.018**2
     if Eri != 0:
         vemperr += (-0.583 * Eri)**2 * ((0.016 / -0.583)**2 + (Eer / Eri)**2)
@@ -361,7 +269,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
     vemperr = vemperr**0.5
     # l emp
     lemp = 0.215 * Eri - 0.119 * Sri - 0.152 * IVL + 0.053 * IAB + 0.986
-    lempul = aggregateUL([Eul, Sul, IVLul, IABul])
+    lempul = uncertainty.aggregate([Eul, Sul, IVLul, IABul])
     lemperr = (-0.152 * IVL)**2 * ((0.003 / -0.152)**2 + (IVLer / IVL)**2) + 0.004**2
     if Eri != 0:
         lemperr += (0.215 * Eri)**2 * ((0.004 / 0.215)**2 + (Eer / Eri)**2)
@@ -372,7 +280,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
     lemperr = lemperr**0.5
     # c emp
     cemp = -0.253 * Eri - 0.296 * Bri + 0.157 * IVL - 0.189
-    cempul = aggregateUL([Eul, Bul, IVLul])
+    cempul = uncertainty.aggregate([Eul, Bul, IVLul])
     cemperr = (0.157 * IVL)**2 * ((0.004 / 0.157)**2 + (IVLer / IVL)**2) + 0.005**2
     if Eri != 0:
         cemperr += (-0.253 * Eri)**2 * ((0.004 / -0.253)**2 + (Eer / Eri)**2)
@@ -380,9 +288,9 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
         cemperr += (-0.296 * Bri)**2 * ((0.002 / -0.296)**2 + (Ber / Bri)**2)
     cemperr = cemperr**0.5
     # calculate aggregate UL of empirical system parameters
-    ULslvemp = aggregateUL([sempul, aempul, bempul, vempul, lempul, cempul])
+    ULslvemp = uncertainty.aggregate([sempul, aempul, bempul, vempul, lempul, cempul])
     # choose which method to use for system parameters and calculate logVP, aggregate UL and error
-    if type(ULslvqspr) is str or (type(ULslvqspr) is not str and type(ULslvemp) is not str and ULslvqspr < aggregateUL([ULslvemp, ULemptra])):
+    if type(ULslvqspr) is str or (type(ULslvqspr) is not str and type(ULslvemp) is not str and ULslvqspr < uncertainty.aggregate([ULslvemp, ULemptra])):
         if type(ULslvqspr) is str:
             domainnotes.append('system parameters: experimental or user values')
         else:
@@ -393,7 +301,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
                  solutedependencies[0]['V'][0] * solutedependencies[0]['v'][0] + \
                  solutedependencies[0]['L'][0] * solutedependencies[0]['l'][0] + \
                  solutedependencies[0]['c'][0]
-        logVPUL = aggregateUL([ULslt, ULslvqspr], roundup=True)
+        logVPUL = uncertainty.aggregate([ULslt, ULslvqspr], roundup=True)
         logVPerr = (solutedependencies[0]['V'][0]*solutedependencies[0]['v'][2])**2 + \
                     (solutedependencies[0]['L'][0]*solutedependencies[0]['l'][0])**2 * ((solutedependencies[0]['L'][2]/solutedependencies[0]['L'][0])**2 + (solutedependencies[0]['l'][2]/solutedependencies[0]['l'][0])**2) + \
                     solutedependencies[0]['c'][2]**2
@@ -409,19 +317,19 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
             domainnotes.append('system parameters: experimental or user solute descriptors plus empirical correlations applied')
             if ULemptra > 1:
                 domainnotes.append('solute descriptors out of AD of empirical correlations')
-                ULslvemp = aggregateUL([ULslvemp, ULemptra])
+                ULslvemp = uncertainty.aggregate([ULslvemp, ULemptra])
         else:
             domainnotes.append('system parameters: solute QSPRs plus empirical correlations applied')
             if ULemptra > 1:
                 domainnotes.append('solute descriptors out of AD of empirical correlations')
-            ULslvemp = aggregateUL([ULslvemp, ULemptra])
+            ULslvemp = uncertainty.aggregate([ULslvemp, ULemptra])
         logVP = solutedependencies[0]['S'][0] * semp + \
                  solutedependencies[0]['A'][0] * aemp + \
                  solutedependencies[0]['B'][0] * bemp + \
                  solutedependencies[0]['V'][0] * vemp + \
                  solutedependencies[0]['L'][0] * lemp + \
                  cemp
-        logVPUL = aggregateUL([ULslt, ULslvemp], roundup=True)
+        logVPUL = uncertainty.aggregate([ULslt, ULslvemp], roundup=True)
         logVPerr = (solutedependencies[0]['V'][0]*vemperr)**2 + \
                     (solutedependencies[0]['L'][0]*lemp)**2 * ((solutedependencies[0]['L'][2]/solutedependencies[0]['L'][0])**2 + (lemperr/lemp)**2) + \
                     cemperr**2
@@ -21,12 +21,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['S', 'A', 'B', 'V', 'L', 'MVliquid', 'state']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {'O': (round(np.log10(3169.0), round_digits), 0, np.nan, 'experimental value used', 'well known value', units, endpoint)}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     domainnotes = [propagated_domain_notes]
     # calculate AB and ABerr
     AB = (solutedependencies[0]['A'][0] * solutedependencies[0]['B'][0])**0.5
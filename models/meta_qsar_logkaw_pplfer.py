@@ -1,5 +1,7 @@
 """Meta QSAR for logKaw"""
 import numpy as np
+from . import batch
+from . import uncertainty
 value_names = ('logKaw',)
 version = 1
 endpoint = 'Log of air-water partition coefficient (Henry\'s Law Constant)'
@@ -22,12 +24,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['S', 'A', 'B', 'V', 'L']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     # calculate log Koa with pplfer equation from Brown 2021
     logKaw = -2.26 * solutedependencies[0]['S'][0] \
              - 3.72 * solutedependencies[0]['A'][0] \
@@ -104,3 +105,28 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
 
     return round(logKaw, round_digits), logKawUL, round(logKawerr, round_digits), '; '.join(domainnotes), citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    S, A, B, V, L = [np.asarray(solutedependencies[sltdes][0], dtype=float) for sltdes in ['S', 'A', 'B', 'V', 'L']]
+    Serr, Aerr, Berr, Lerr = [np.asarray(solutedependencies[sltdes][2], dtype=float) for sltdes in ['S', 'A', 'B', 'L']]
+    # calculate log Koa with pplfer equation from Brown 2021
+    logKaw = -2.26 * S \
+             - 3.72 * A \
+             - 4.78 * B \
+             + 2.19 * V \
+             - 0.38 * L \
+             + 0.64
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logKawerr = (V * 0.06)**2 + \
+                    (L * -0.38)**2 * ((Lerr / L)**2 + (0.02 / -0.38)**2) + \
+                    0.03**2
+        logKawerr = np.where(S != 0, logKawerr + (S * -2.26)**2 * ((Serr / S)**2 + (0.05 / -2.26)**2), logKawerr)
+        logKawerr = np.where(A != 0, logKawerr + (A * -3.72)**2 * ((Aerr / A)**2 + (0.04 / -3.72)**2), logKawerr)
+        logKawerr = np.where(B != 0, logKawerr + (B * -4.78)**2 * ((Berr / B)**2 + (0.04 / -4.78)**2), logKawerr)
+    logKawerr = np.sqrt(logKawerr)
+    logKawUL, domainnotes, errorscale = uncertainty.solute_descriptor_ul(dict((sltdes, solutedependencies[sltdes][1]) for sltdes in ['S', 'A', 'B', 'L']))
+    logKawerr *= errorscale
+
+    return batch.round_column(logKaw, round_digits), logKawUL, batch.round_column(logKawerr, round_digits), batch.join_notes('; ', propagated_domain_notes, domainnotes), citation, units, endpoint
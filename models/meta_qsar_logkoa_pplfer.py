@@ -1,5 +1,7 @@
 """Meta QSAR for logKoa (dry solvent)"""
 import numpy as np
+from . import batch
+from . import uncertainty
 value_names = ('logKoa',)
 version = 1
 endpoint = 'Log of octanol-air partition coefficient'
@@ -22,12 +24,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['S', 'A', 'B', 'V', 'L']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     # calculate log Koa with pplfer equation from Brown 2021
     logKoa = 0.69 * solutedependencies[0]['S'][0] \
              + 3.56 * solutedependencies[0]['A'][0] \
@@ -104,3 +105,28 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
 
     return round(logKoa, round_digits), logKoaUL, round(logKoaerr, round_digits), ', '.join(domainnotes), citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    S, A, B, V, L = [np.asarray(solutedependencies[sltdes][0], dtype=float) for sltdes in ['S', 'A', 'B', 'V', 'L']]
+    Serr, Aerr, Berr, Lerr = [np.asarray(solutedependencies[sltdes][2], dtype=float) for sltdes in ['S', 'A', 'B', 'L']]
+    # calculate log Koa with pplfer equation from Brown 2021
+    logKoa = 0.69 * S \
+             + 3.56 * A \
+             + 0.73 * B \
+             + 0.52 * V \
+             + 0.79 * L \
+             -0.26
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logKoaerr = (V * 0.08)**2 + \
+                    (L * 0.79)**2 * ((Lerr / L)**2 + (0.02 / 0.79)**2) + \
+                    0.03**2
+        logKoaerr = np.where(S != 0, logKoaerr + (S * 0.69)**2 * ((Serr / S)**2 + (0.05 / 0.69)**2), logKoaerr)
+        logKoaerr = np.where(A != 0, logKoaerr + (A * 3.56)**2 * ((Aerr / A)**2 + (0.04 / 3.56)**2), logKoaerr)
+        logKoaerr = np.where(B != 0, logKoaerr + (B * 0.73)**2 * ((Berr / B)**2 + (0.04 / 0.73)**2), logKoaerr)
+    logKoaerr = np.sqrt(logKoaerr)
+    logKoaUL, domainnotes, errorscale = uncertainty.solute_descriptor_ul(dict((sltdes, solutedependencies[sltdes][1]) for sltdes in ['S', 'A', 'B', 'L']))
+    logKoaerr *= errorscale
+
+    return batch.round_column(logKoa, round_digits), logKoaUL, batch.round_column(logKoaerr, round_digits), batch.join_notes(', ', propagated_domain_notes, domainnotes), citation, units, endpoint
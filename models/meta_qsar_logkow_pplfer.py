@@ -1,5 +1,7 @@
 """Meta QSAR for logKow (wet solvent)"""
 import numpy as np
+from . import batch
+from . import uncertainty
 value_names = ('logKow',)
 version = 1
 endpoint = 'Log of wet (practical) octanol-water partition coefficient (log P)'
@@ -21,12 +23,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['S', 'A', 'B', 'V', 'L']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     # calculate log Kow with pplfer equation from Brown 2023
     logKow = - 1.36 * solutedependencies[0]['S'][0] \
              - 0.13 * solutedependencies[0]['A'][0] \
@@ -102,3 +103,27 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
 
     return round(logKow, round_digits), logKowUL, round(logKowerr, round_digits), ', '.join(domainnotes), citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    S, A, B, V, L = [np.asarray(solutedependencies[sltdes][0], dtype=float) for sltdes in ['S', 'A', 'B', 'V', 'L']]
+    Serr, Aerr, Berr, Lerr = [np.asarray(solutedependencies[sltdes][2], dtype=float) for sltdes in ['S', 'A', 'B', 'L']]
+    # calculate log Kow with pplfer equation from Brown 2023
+    logKow = - 1.36 * S \
+             - 0.13 * A \
+             - 3.49 * B \
+             + 2.41 * V \
+             + 0.41 * L \
+             + 0.41
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logKowerr = V**2 * (0.04**2) + \
+            (L * (0.41))**2 * ((Lerr / L)**2 + (0.01**2) / (0.41)**2) + (0.03**2)
+        logKowerr = np.where(S != 0, logKowerr + (S * (-1.35))**2 * ((Serr / S)**2 + (0.04**2) / (-1.35)**2), logKowerr)
+        logKowerr = np.where(A != 0, logKowerr + (A * (-0.13))**2 * ((Aerr / A)**2 + (0.03**2) / (-0.13)**2), logKowerr)
+        logKowerr = np.where(B != 0, logKowerr + (B * (-3.49))**2 * ((Berr / B)**2 + (0.03**2) / (-3.49)**2), logKowerr)
+    logKowerr = np.sqrt(logKowerr)
+    logKowUL, domainnotes, errorscale = uncertainty.solute_descriptor_ul(dict((sltdes, solutedependencies[sltdes][1]) for sltdes in ['S', 'A', 'B', 'L']))
+    logKowerr *= errorscale
+
+    return batch.round_column(logKow, round_digits), logKowUL, batch.round_column(logKowerr, round_digits), batch.join_notes(', ', propagated_domain_notes, domainnotes), citation, units, endpoint
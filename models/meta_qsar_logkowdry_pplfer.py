@@ -1,5 +1,7 @@
 """Meta QSAR for logKow (dry solvent)"""
 import numpy as np
+from . import batch
+from . import uncertainty
 value_names = ('logKowdry',)
 version = 1
 endpoint = 'Log of dry (hypothetical) octanol-water partition coefficient (log P)'
@@ -22,12 +24,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['S', 'A', 'B', 'V', 'L']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     # calculate log Kow with pplfer equation from Brown 2021
     logKow = (0.69-2.26) * solutedependencies[0]['S'][0] \
              + (3.56-3.72) * solutedependencies[0]['A'][0] \
@@ -104,3 +105,28 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
 
     return round(logKow, round_digits), logKowUL, round(logKowerr, round_digits), ', '.join(domainnotes), citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    S, A, B, V, L = [np.asarray(solutedependencies[sltdes][0], dtype=float) for sltdes in ['S', 'A', 'B', 'V', 'L']]
+    Serr, Aerr, Berr, Lerr = [np.asarray(solutedependencies[sltdes][2], dtype=float) for sltdes in ['S', 'A', 'B', 'L']]
+    # calculate log Kow with pplfer equation from Brown 2021
+    logKow = (0.69-2.26) * S \
+             + (3.56-3.72) * A \
+             + (0.73-4.78) * B \
+             + (0.52-(-2.19)) * V \
+             + (0.79-0.38) * L \
+             + (-0.26-(-0.64))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logKowerr = V**2 * (0.08**2 + 0.06**2) + \
+                    (L * (0.79-0.38))**2 * ((Lerr / L)**2 + (0.02**2 + 0.02**2) / (0.79-0.38)**2) + \
+                    (0.03**2 + 0.03**2)
+        logKowerr = np.where(S != 0, logKowerr + (S * (0.69-2.26))**2 * ((Serr / S)**2 + (0.05**2 + 0.05**2) / (0.69-2.26)**2), logKowerr)
+        logKowerr = np.where(A != 0, logKowerr + (A * (3.56-3.72))**2 * ((Aerr / A)**2 + (0.04**2 + 0.04**2) / (3.56-3.72)**2), logKowerr)
+        logKowerr = np.where(B != 0, logKowerr + (B * (0.73-4.78))**2 * ((Berr / B)**2 + (0.04**2 + 0.04**2) / (0.73-4.78)**2), logKowerr)
+    logKowerr = np.sqrt(logKowerr)
+    logKowUL, domainnotes, errorscale = uncertainty.solute_descriptor_ul(dict((sltdes, solutedependencies[sltdes][1]) for sltdes in ['S', 'A', 'B', 'L']))
+    logKowerr *= errorscale
+
+    return batch.round_column(logKow, round_digits), logKowUL, batch.round_column(logKowerr, round_digits), batch.join_notes(', ', propagated_domain_notes, domainnotes), citation, units, endpoint
@@ -1,5 +1,7 @@
 """Meta QSAR for logKoo (wet vs. dry octanol partitioning)"""
 import numpy as np
+from . import batch
+from . import uncertainty
 value_names = ('logKoo',)
 version = 1
 endpoint = 'Log of wet octanol - dry octanol partition coefficient, used as a conversion factor'
@@ -21,12 +23,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['S', 'A', 'B', 'V', 'L']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     # calculate log Kow with pplfer equation from Brown 2021
     logKoo = (-1.36-(-1.57)) * solutedependencies[0]['S'][0] \
              + (-0.13-(-0.16)) * solutedependencies[0]['A'][0] \
@@ -101,3 +102,26 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
 
     return round(logKoo, round_digits), logKooUL, round(logKooerr, round_digits), ', '.join(domainnotes), citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    S, A, B, V, L = [np.asarray(solutedependencies[sltdes][0], dtype=float) for sltdes in ['S', 'A', 'B', 'V', 'L']]
+    Serr, Aerr, Berr, Lerr = [np.asarray(solutedependencies[sltdes][2], dtype=float) for sltdes in ['S', 'A', 'B', 'L']]
+    # calculate log Kow with pplfer equation from Brown 2021
+    logKoo = (-1.36-(-1.57)) * S \
+             + (-0.13-(-0.16)) * A \
+             + (-3.49-(-4.05)) * B \
+             + (2.41-(2.71)) * V \
+             + (0.41-(0.41)) * L \
+             + (0.41-(0.38))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logKooerr = V**2 * (0.06**2 + (0.08**2 + 0.06**2)) + (0.03**2 + (0.03**2 + 0.03**2))
+        logKooerr = np.where(S != 0, logKooerr + (S * (-1.35-(-1.57)))**2 * ((Serr / S)**2 + (0.04**2 + (0.05**2 + 0.05**2)) / (-1.35-(-1.57))**2), logKooerr)
+        logKooerr = np.where(A != 0, logKooerr + (A * (-0.13-(-0.16)))**2 * ((Aerr / A)**2 + (0.03**2 + (0.04**2 + 0.04**2)) / (-0.13-(-0.16))**2), logKooerr)
+        logKooerr = np.where(B != 0, logKooerr + (B * (-3.49-(-4.05)))**2 * ((Berr / B)**2 + (0.03**2 + (0.04**2 + 0.04**2)) / (-3.49-(-4.05))**2), logKooerr)
+    logKooerr = np.sqrt(logKooerr)
+    logKooUL, domainnotes, errorscale = uncertainty.solute_descriptor_ul(dict((sltdes, solutedependencies[sltdes][1]) for sltdes in ['S', 'A', 'B', 'L']))
+    logKooerr *= errorscale
+
+    return batch.round_column(logKoo, round_digits), logKooUL, batch.round_column(logKooerr, round_digits), batch.join_notes(', ', propagated_domain_notes, domainnotes), citation, units, endpoint
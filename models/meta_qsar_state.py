@@ -1,5 +1,7 @@
 """Meta QSAR for state"""
 import numpy as np
+from . import LeverageFactor
+from . import uncertainty
 value_names = ('state',)
 version = 1
 endpoint = 'Chemical state at room temperature (25degC)'
@@ -25,7 +27,6 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['E', 'S', 'A', 'B', 'V', 'L', 'tmconsensus', 'tbpplfer']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 emptrainset = np.array([[1.01, 0.94, 0, 0.2, 1.0323, 4.68],
@@ -1384,69 +1385,12 @@ emptrainset = np.array([[1.01, 0.94, 0, 0.2, 1.0323, 4.68],
                         [-1.04, 0.17, 0.62, 0.31, 1.7846, 2.96],
                         [-0.3, 0.18, 0.69, 0.11, 0.8548, 1.937],
                         ], dtype=float)
-xtxi = np.linalg.inv(np.matmul(emptrainset.T, emptrainset))
+leverage_factor = LeverageFactor(emptrainset)
 
 stored = {'O': (np.nan, np.nan, np.nan, 'likely liquid', 'well known value', units, endpoint)}
 
 
-def aggregateUL(ULlist, roundup=False):
-    ise = False
-    isu = False
-    is5 = False
-    numul = None
-    numcount = 0
-    for UL in ULlist:
-        if type(UL) is str:
-            if UL == 'E':
-                ise = True
-            elif UL == 'U':
-                isu = True
-            elif UL == 'EU':
-                ise = True
-                isu = True
-            else:
-                if 'E' in UL:
-                    ise = True
-                if 'U' in UL:
-                    isu = True
-                if UL.replace('E', '').replace('U', '') == '5':
-                    is5 = True
-                if numul is None:
-                    numul = float(UL.replace('E', '').replace('U', ''))**2
-                else:
-                    numul += float(UL.replace('E', '').replace('U', ''))**2
-                numcount += 1
-        else:
-            if UL == 5:
-                is5 = True
-            if numul is None:
-                numul = UL**2
-            else:
-                numul += UL**2
-            numcount += 1
-    ulconcat = []
-    if ise:
-        ulconcat.append('E')
-    if isu:
-        ulconcat.append('U')
-    if numul is not None:
-        if is5:
-            ULtot = 5
-        elif roundup:
-            ULtot = int(np.ceil((numul/numcount)**0.5))
-        else:
-            ULtot = (numul/numcount)**0.5
-    else:
-        ULtot = None
-    if len(ulconcat) and ULtot is not None:
-        ulconcat.append(str(ULtot))
-        ULtot = ''.join(ulconcat)
-    elif len(ulconcat) and ULtot is None:
-        ULtot = ''.join(ulconcat)
-    return ULtot
-
-
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     # calculate leverage of the solvent vs. the empirical correlations training dataset
     x = np.array([solutedependencies[0]['E'][0],
                   solutedependencies[0]['S'][0],
@@ -1454,7 +1398,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
                   solutedependencies[0]['B'][0],
                   solutedependencies[0]['V'][0],
                   solutedependencies[0]['L'][0]])
-    leverage = np.matmul(np.matmul(x, xtxi), x.T)
+    leverage = leverage_factor.leverage(x)
     if leverage < 1.5 * 6 / 1355:
         ULliqset = 0
     elif leverage < 3 * 6 / 1355:
@@ -1490,19 +1434,11 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
     # calculate UL
     ULlist = []
     for sltdes in ['E', 'S', 'A', 'B', 'L', 'tmconsensus', 'tbpplfer']:
-        if solutedependencies[0][sltdes][1] in ['E', 'U']:
-            ULlist.append(solutedependencies[0][sltdes][1])
-        elif solutedependencies[0][sltdes][1] < 4:
-            ULlist.append(solutedependencies[0][sltdes][1])
-        elif solutedependencies[0][sltdes][1] == 4 and sltdes not in ['L', 'tmconsensus', 'tbpplfer']:
-            ULlist.append(1)
-        elif solutedependencies[0][sltdes][1] == 4:
-            ULlist.append(2)
-        elif solutedependencies[0][sltdes][1] == 5:
-            ULlist.append(5)
-        elif solutedependencies[0][sltdes][1] == 6:
-            ULlist.append(3)
-    ULslt = aggregateUL(ULlist, roundup=True)
+        if sltdes not in ['L', 'tmconsensus', 'tbpplfer']:
+            ULlist.append(uncertainty.descriptor_level(solutedependencies[0][sltdes][1], four=1))
+        else:
+            ULlist.append(uncertainty.descriptor_level(solutedependencies[0][sltdes][1], four=2))
+    ULslt = uncertainty.aggregate(ULlist, roundup=True)
 
     return np.nan, ULslt, np.nan, domainnote, citation, units, endpoint
 
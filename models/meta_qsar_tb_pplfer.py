@@ -1,5 +1,6 @@
 """Meta QSAR for temperature of boiling from PPLFER (tbpplfer) (boiling point)"""
 import numpy as np
+from . import LeverageFactor
 value_names = ('tbpplfer',)
 version = 1
 endpoint = 'Boiling point - predicted by PPLFER'
@@ -16,7 +17,6 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['E', 'S', 'A', 'B', 'V', 'L']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 emptrainset = np.array([[0.11, 0.6, 0, 0.45, 0.8875, 2.893],
@@ -1372,11 +1372,11 @@ emptrainset = np.array([[0.11, 0.6, 0, 0.45, 0.8875, 2.893],
                         [0.71, 0.62, 0, 0, 0.6648, 2.983],
                         [0.16, 0.08, 0, 0.07, 0.7701, 2.226],
                         ], dtype=float)
-xtxi = np.linalg.inv(np.matmul(emptrainset.T, emptrainset))
+leverage_factor = LeverageFactor(emptrainset)
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     domainnotes = [propagated_domain_notes]
     # calculate BP
     BP = 13.0 * solutedependencies[0]['E'][0] + \
@@ -1394,7 +1394,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
                   solutedependencies[0]['B'][0],
                   solutedependencies[0]['V'][0],
                   solutedependencies[0]['L'][0]])
-    leverage = np.matmul(np.matmul(x, xtxi), x.T)
+    leverage = leverage_factor.leverage(x)
     if leverage < 1.5 * 6 / 1355:
         trainUL = 0
     elif leverage < 3 * 6 / 1355:
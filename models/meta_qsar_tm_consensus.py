@@ -1,5 +1,7 @@
 """Meta QSAR for temperature of melting, consensus of two models (tmconsensus) (melting point)"""
 import numpy as np
+from . import batch
+from . import uncertainty
 value_names = ('tmconsensus',)
 version = 1
 endpoint = 'Melting point - mean of QSPR and PPLFER predictions'
@@ -21,12 +23,11 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['tm', 'tmpplfer']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     tmUL = solutedependencies[0]['tm'][1]
     if tmUL == 4:
         tmUL = 2
@@ -65,3 +66,24 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
         MPerr = ((0.5 * solutedependencies[0]['tm'][2])**2 + (0.5 * solutedependencies[0]['tmpplfer'][2])**2)**0.5
     return round(MP, round_digits), MPUL, round(MPerr, round_digits), propagated_domain_notes, citation, units, endpoint
 
+
+def calculate_many(solutedependencies, propagated_domain_notes=''):
+    # calculate for columns of solute dependency values, ULs and errors of many chemicals at once,
+    # the results are the same as those of calculate for each chemical
+    tm, tmpplfer = [np.asarray(solutedependencies[d][0], dtype=float) for d in ['tm', 'tmpplfer']]
+    tmerr, tmpplfererr = [np.asarray(solutedependencies[d][2], dtype=float) for d in ['tm', 'tmpplfer']]
+    (tmUL, tmflags), (tmPPUL, tmPPflags) = [uncertainty.encode_column(solutedependencies[d][1]) for d in ['tm', 'tmpplfer']]
+    tmUL[tmUL == 4] = 2
+    tmPPUL[tmPPUL == 4] = 2
+    MP = (tm + tmpplfer) / 2
+    MPUL = np.where((tmUL == 5) | (tmPPUL == 5), 5, np.ceil(np.sqrt((tmUL**2 + tmPPUL**2) / 2)))
+    MPerr = np.sqrt((0.5 * tmerr)**2 + (0.5 * tmpplfererr)**2)
+    MPUL = batch.full(np.where(np.isnan(MPUL), 0, MPUL).astype(int).tolist(), len(MP))
+    MP = batch.round_column(MP, round_digits)
+    MPerr = batch.round_column(MPerr, round_digits)
+    domainnotes = batch.full(propagated_domain_notes, len(MP))
+    # chemicals with experimental or user values (or without ULs) are calculated one at a time
+    scalar = np.nonzero((tmflags != 0) | (tmPPflags != 0) | np.isnan(tmUL) | np.isnan(tmPPUL))[0]
+    if len(scalar):
+        MP[scalar], MPUL[scalar], MPerr[scalar], domainnotes[scalar] = batch.calculate_rows(calculate, solutedependencies, propagated_domain_notes, rows=scalar)
+    return MP, MPUL, MPerr, domainnotes, citation, units, endpoint
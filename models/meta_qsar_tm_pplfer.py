@@ -1,5 +1,6 @@
 """Meta QSAR for temperature of melting from PPLFER (tmpplfer) (melting point)"""
 import numpy as np
+from . import LeverageFactor
 value_names = ('tmpplfer',)
 version = 1
 endpoint = 'Melting point - predicted by PPLFER'
@@ -16,7 +17,6 @@ chemical_inputs = {'solute min': 1, 'solute max': 1,
 solute_dependencies_list = ['E', 'S', 'A', 'B', 'V', 'L']
 solvent_dependencies_list = []
 component_dependencies_list = []
-propagated_domain_notes = ''
 smiles_flag = 'neutrals'
 
 emptrainset = np.array([[0.08, 0.08, 0, 0.07, 2.1791, 7.006],
@@ -2283,11 +2283,11 @@ emptrainset = np.array([[0.08, 0.08, 0, 0.07, 2.1791, 7.006],
                         [0.39, 0.44, 0.27, 0.59, 0.9041, 3.279],
                         [4, 2.04, 0, 0.44, 2.1924, 13.068],
                         ], dtype=float)
-xtxi = np.linalg.inv(np.matmul(emptrainset.T, emptrainset))
+leverage_factor = LeverageFactor(emptrainset)
 
 stored = {}
 
-def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf):
+def calculate(solutedependencies, solventdependencies, componentdependencies, solutef, solventf, componentf, propagated_domain_notes=''):
     domainnotes = [propagated_domain_notes]
     # calculate MP
     MP = 53.6 * solutedependencies[0]['E'][0] + \
@@ -2304,7 +2304,7 @@ def calculate(solutedependencies, solventdependencies, componentdependencies, so
                   solutedependencies[0]['B'][0],
                   solutedependencies[0]['V'][0],
                   solutedependencies[0]['L'][0]])
-    leverage = np.matmul(np.matmul(x, xtxi), x.T)
+    leverage = leverage_factor.leverage(x)
     if leverage < 1.5 * 6 / 1355:
         trainUL = 0
     elif leverage < 3 * 6 / 1355:
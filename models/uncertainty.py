@@ -0,0 +1,172 @@
+"""
+ifsqsar/models/uncertainty.py
+developed by Trevor N. Brown
+Algebra of the uncertainty levels (ULs) that the Meta QSARs use to aggregate the ULs of their dependencies
+
+A UL is a numeric level (see section 6 of the README), 'E' or 'U' for experimental or user values, or a
+combination like 'E2' or 'EU1' for a value aggregated from experimental, user and predicted values. Here a
+UL is encoded as a numeric level (None, or nan in arrays, if it has none) and the E and U flag bits, so
+the ULs of many chemicals can be aggregated with arrays and only turned back into strings at the end.
+"""
+
+import numpy as np
+from . import batch
+
+# flag bits of experimental and user values
+E = 1
+U = 2
+
+
+def encode(UL):
+    """Return the numeric level (None if there is none, or it is nan) and the E/U flag bits of a UL"""
+    if type(UL) is not str:
+        if UL is None or not np.isfinite(UL):
+            return None, 0
+        return UL, 0
+    flags = 0
+    if 'E' in UL:
+        flags |= E
+    if 'U' in UL:
+        flags |= U
+    level = UL.replace('E', '').replace('U', '')
+    if level == '':
+        return None, flags
+    return float(level), flags
+
+
+def decode(level, flags):
+    """Return the UL of a numeric level (or None) and E/U flag bits"""
+    ulconcat = []
+    if flags & E:
+        ulconcat.append('E')
+    if flags & U:
+        ulconcat.append('U')
+    if not len(ulconcat):
+        return level
+    if level is not None:
+        ulconcat.append(str(level))
+    return ''.join(ulconcat)
+
+
+def descriptor_level(UL, four=1):
+    """Map the UL of a dependency to the level it has in aggregate ULs, 4 becomes four and 6 becomes 3,
+    E/U and nan ULs are returned as they are (aggregate skips nan ULs)"""
+    if type(UL) is str:
+        return UL
+    elif UL == 4:
+        return four
+    elif UL == 6:
+        return 3
+    return UL
+
+
+def aggregate(ULlist, roundup=False):
+    """Aggregate a list of ULs as the root mean square of their numeric levels.
+
+    Any level 5 makes the aggregate 5, roundup rounds the aggregate up to an integer level. The E/U flags
+    of all the ULs are kept. nan ULs are skipped, returns None if the list has no other ULs.
+    """
+    flags = 0
+    is5 = False
+    numul = None
+    numcount = 0
+    for UL in ULlist:
+        level, ulflags = encode(UL)
+        flags |= ulflags
+        if level is None:
+            continue
+        if level == 5:
+            is5 = True
+        if numul is None:
+            numul = level**2
+        else:
+            numul += level**2
+        numcount += 1
+    if numul is None:
+        ULtot = None
+    elif is5:
+        ULtot = 5
+    elif roundup:
+        ULtot = int(np.ceil((numul/numcount)**0.5))
+    else:
+        ULtot = (numul/numcount)**0.5
+    return decode(ULtot, flags)
+
+
+def encode_column(uls):
+    """Encode a column of ULs as a float array of numeric levels (nan if there is none) and an int array of flag bits"""
+    uls = np.asarray(uls, dtype=object)
+    isstr = np.array([type(UL) is str for UL in uls.tolist()], dtype=bool)
+    levels = np.where(isstr, np.nan, uls).astype(float)
+    levels[~np.isfinite(levels)] = np.nan
+    flags = np.zeros(len(uls), dtype=int)
+    for i in np.nonzero(isstr)[0]:
+        level, flags[i] = encode(uls[i])
+        if level is not None:
+            levels[i] = level
+    return levels, flags
+
+
+def decode_column(levels, flags, roundup=False):
+    """Return the column of ULs of arrays of numeric levels and flag bits, levels are int if they were rounded up"""
+    if roundup:
+        numeric = [None if not np.isfinite(level) else int(level) for level in levels.tolist()]
+    else:
+        numeric = [None if not np.isfinite(level) else 5 if level == 5 else level for level in levels.tolist()]
+    column = np.empty(len(numeric), dtype=object)
+    column[:] = [decode(level, flag) for level, flag in zip(numeric, flags.tolist())]
+    return column
+
+
+def descriptor_levels(levels, four=1):
+    """Map an array of the numeric levels of a dependency to their levels in aggregate ULs, like descriptor_level"""
+    return np.where(levels == 4, four, np.where(levels == 6, 3, levels))
+
+
+def aggregate_columns(levels, flags, roundup=False):
+    """Aggregate lists of arrays of numeric levels and flag bits (one array of each for every UL that is
+    aggregated) like aggregate does for each chemical, returns the arrays of the aggregate levels and flags"""
+    numul = np.zeros(len(levels[0]), dtype=float)
+    numcount = np.zeros(len(levels[0]), dtype=int)
+    is5 = np.zeros(len(levels[0]), dtype=bool)
+    ulflags = np.zeros(len(levels[0]), dtype=int)
+    for level, flag in zip(levels, flags):
+        numeric = np.isfinite(level)
+        numul[numeric] += level[numeric]**2
+        numcount += numeric
+        is5 |= level == 5
+        ulflags |= flag
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ULtot = np.sqrt(numul / numcount)
+    if roundup:
+        ULtot = np.ceil(ULtot)
+    ULtot[is5] = 5
+    return ULtot, ulflags
+
+
+def solute_descriptor_ul(uls):
+    """Aggregate UL of the PPLFER equations of the Meta QSARs over columns of the S, A, B and L solute descriptor ULs.
+
+    Returns the column of ULs (int, or str if there are experimental or user values), the column of
+    applicability domain notes and the column of error scaling factors, as the calculate functions do.
+    """
+    levels = []
+    flags = []
+    for sltdes in ['S', 'A', 'B', 'L']:
+        level, flag = encode_column(uls[sltdes])
+        if sltdes != 'L':
+            levels.append(descriptor_levels(level, four=1))
+        else:
+            levels.append(descriptor_levels(level, four=2))
+        flags.append(flag)
+    ULtot, ulflags = aggregate_columns(levels, flags, roundup=True)
+    ulcolumn = decode_column(ULtot, ulflags, roundup=True)
+    # notes on the aggregate UL
+    predicted = ~np.isnan(ULtot)
+    flagged = ulflags != 0
+    inad = np.where(ULtot <= 1, 'aggregate solute descriptor UL is in the AD', 'aggregate solute descriptor UL is out of the AD')
+    sources = np.char.add(np.where(ulflags & E, 'experimental, ', ''), np.where(ulflags & U, 'user, ', ''))
+    notes = np.where(flagged, np.char.add(np.char.add(sources, 'predicted values, '), inad), inad)
+    notes = np.where(~predicted, 'experimental or user values, aggregate solute descriptor UL is in the AD', notes)
+    errorscale = np.where(~predicted & (ulflags == E), 1, 1.25)
+    return ulcolumn, notes.astype(object), errorscale
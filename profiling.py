@@ -0,0 +1,76 @@
+"""
+ifsqsar/profiling.py
+developed by Trevor N. Brown
+Records the time spent in each phase of starting up ifsqsar (imports, model loading, GUI) and reports it as JSON
+"""
+
+import sys
+import time
+import json
+import threading
+import contextlib
+
+# phases in the order they finished, each a dict of phase, name, parent, start and seconds
+phases = []
+# time zero of the report, when ifsqsar was first imported
+_origin = time.perf_counter()
+# names of the phases each thread is currently in, to record the parent of nested phases
+_active = threading.local()
+
+
+@contextlib.contextmanager
+def phase(phasename, name=''):
+    """Context manager that records the time spent in a phase of start up, e.g. the import of one model module"""
+    if not hasattr(_active, 'stack'):
+        _active.stack = []
+    if len(_active.stack) > 0:
+        parent = _active.stack[-1]
+    else:
+        parent = ''
+    _active.stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _active.stack.pop()
+        phases.append({'phase': phasename, 'name': name, 'parent': parent,
+                       'start': round(start - _origin, 6), 'seconds': round(seconds, 6)})
+
+
+@contextlib.contextmanager
+def import_phase(modulename):
+    """Context manager around an import statement that records the time only for the first import of a module"""
+    if modulename in sys.modules:
+        yield
+    else:
+        with phase('import', modulename):
+            yield
+
+
+def startup_report():
+    """Return the recorded phases and the total time of each type of phase as a dict.
+
+    Phases can be nested (e.g. a leverage factor calculated while a Meta QSAR module is imported),
+    the parent of a nested phase is the name of the phase it was recorded in. Totals only add up
+    the phases that are not nested in a phase of the same type.
+    """
+    totals = {}
+    for p in phases:
+        totals.setdefault(p['phase'], 0.)
+    for p in phases:
+        nested = any(q['phase'] == p['phase'] and q['start'] < p['start'] and
+                     q['start'] + q['seconds'] >= p['start'] + p['seconds'] for q in phases if q is not p)
+        if not nested:
+            totals[p['phase']] += p['seconds']
+    return {'totals': dict((phasename, round(seconds, 6)) for phasename, seconds in totals.items()),
+            'phases': list(phases)}
+
+
+def write_startup_report(filename=None):
+    """Write the startup report as JSON to a file, or return it as a string if no file name is passed"""
+    reportstring = json.dumps(startup_report(), indent=1)
+    if filename is None:
+        return reportstring
+    with open(filename, 'w') as reportfile:
+        reportfile.write(reportstring)
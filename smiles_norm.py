@@ -4,7 +4,10 @@ developed by Trevor N. Brown
 Implements a function that takes a SMILES and converts it to a standardized form and returns it as an openbabel OBMol
 """
 
-from openbabel import openbabel as ob
+from . import profiling
+with profiling.import_phase('openbabel'):
+    from openbabel import openbabel as ob
+from . import context
 import re
 
 class IFSMol(ob.OBMol):
@@ -15,8 +18,37 @@ class IFSMol(ob.OBMol):
         self.sminote = ''
         self.neutralize = None
         self.filter = ''
+        # unique matches of shared SMARTS patterns, keyed by hydrogen state and pattern
+        self.smartsmatches = {}
+        # copies of the molecule with explicit (True) or implicit (False) hydrogens
+        self.hydrogenviews = {}
+        # element counts and number of rings of the hydrogen views
+        self.compositions = {}
         super(IFSMol, self).__init__()
 
+    def get_hydrogen_view(self, explicith):
+        """Return a copy of the molecule with explicit or implicit hydrogens, which is created once
+        and then reused so that the molecule itself is never modified by the QSARs"""
+        if explicith not in self.hydrogenviews:
+            view = ob.OBMol(self)
+            if explicith:
+                view.AddHydrogens()
+            else:
+                view.DeleteHydrogens()
+            self.hydrogenviews[explicith] = view
+        return self.hydrogenviews[explicith]
+
+    def get_composition(self, explicith):
+        """Return a dict of the number of atoms of each element (atomic number) and
+        the number of rings in the view of the molecule with explicit or implicit hydrogens"""
+        if explicith not in self.compositions:
+            view = self.get_hydrogen_view(explicith)
+            elementcounts = {}
+            for atom in ob.OBMolAtomIter(view):
+                elementcounts[atom.GetAtomicNum()] = elementcounts.get(atom.GetAtomicNum(), 0) + 1
+            self.compositions[explicith] = (elementcounts, len(view.GetSSSR()))
+        return self.compositions[explicith]
+
 
 # initialize smarts for handling silicon implicit hydrogens
 silicon3 = ob.OBSmartsPattern()
@@ -79,28 +111,26 @@ def convertsmiles(smiles, obconversion=None, neutralize=True, filtertype='not in
     # instantiate obconversion if necessary
     if obconversion is None:
         obconversion = ob.OBConversion()
+    # the shared SMARTS patterns are matched through the context of this thread
+    evaluationcontext = context.get_context()
 
     # handle silicon valence, fill up to valence 4 with implicit hydrogens
     if '[Si]' in smiles:
         obconversion.SetInAndOutFormats('smi', 'smi')
         obconversion.ReadString(mol, smiles)
-        silicon0.Match(mol)
-        for atom in silicon0.GetUMapList():
+        for atom in evaluationcontext.match(silicon0, mol):
             thisatom = mol.GetAtom(atom[0])
             thisatom.SetImplicitHCount(4)
             mol.AddHydrogens(thisatom)
-        silicon1.Match(mol)
-        for atom in silicon1.GetUMapList():
+        for atom in evaluationcontext.match(silicon1, mol):
             thisatom = mol.GetAtom(atom[0])
             thisatom.SetImplicitHCount(3)
             mol.AddHydrogens(thisatom)
-        silicon2.Match(mol)
-        for atom in silicon2.GetUMapList():
+        for atom in evaluationcontext.match(silicon2, mol):
             thisatom = mol.GetAtom(atom[0])
             thisatom.SetImplicitHCount(2)
             mol.AddHydrogens(thisatom)
-        silicon3.Match(mol)
-        for atom in silicon3.GetUMapList():
+        for atom in evaluationcontext.match(silicon3, mol):
             thisatom = mol.GetAtom(atom[0])
             thisatom.SetImplicitHCount(1)
             mol.AddHydrogens(thisatom)
@@ -133,33 +163,33 @@ def convertsmiles(smiles, obconversion=None, neutralize=True, filtertype='not in
         changes.append('salts stripped')
 
     # check for filters
-    organometallicatom.Match(mol)
+    organometallicmatches = evaluationcontext.match(organometallicatom, mol)
     if filtertype in ['organic', 'not inorganic', 'carbon']:
-        anyatom.Match(mol)
-        organicatom.Match(mol)
-        inorganicatom.Match(mol)
-        carbonatom.Match(mol)
+        anymatches = evaluationcontext.match(anyatom, mol)
+        organicmatches = evaluationcontext.match(organicatom, mol)
+        inorganicmatches = evaluationcontext.match(inorganicatom, mol)
+        carbonmatches = evaluationcontext.match(carbonatom, mol)
         isinorganic = False
-        if len(carbonatom.GetUMapList()) == 0 or \
-           (len(inorganicatom.GetUMapList()) == len(anyatom.GetUMapList()) and len(inorganicatom.GetUMapList()) <= 3):
+        if len(carbonmatches) == 0 or \
+           (len(inorganicmatches) == len(anymatches) and len(inorganicmatches) <= 3):
             isinorganic = True
         if filtertype == 'organic' and (isinorganic or
-           len(organicatom.GetUMapList()) < len(anyatom.GetUMapList())):
+           len(organicmatches) < len(anymatches)):
             localmol = IFSMol()
             localmol.sminote = 'SMILES error: structure fails organic filter'
             return localmol, localmol.normsmiles, localmol.sminote
         elif filtertype == 'not inorganic' and (isinorganic or
-                                                len(organicatom.GetUMapList()) + len(organometallicatom.GetUMapList()) < len(anyatom.GetUMapList())):
+                                                len(organicmatches) + len(organometallicmatches) < len(anymatches)):
             localmol = IFSMol()
             localmol.sminote = 'SMILES error: structure fails not inorganic filter'
             return localmol, localmol.normsmiles, localmol.sminote
-        elif filtertype == 'carbon' and len(carbonatom.GetUMapList()) == 0:
+        elif filtertype == 'carbon' and len(carbonmatches) == 0:
             localmol = IFSMol()
             localmol.sminote = 'SMILES error: structure fails carbon atom filter'
             return localmol, localmol.normsmiles, localmol.sminote
 
     # do not inchify organometallics, it disconnects the structures
-    if len(organometallicatom.GetUMapList()) == 0:
+    if len(organometallicmatches) == 0:
         # inchify smiles and read into obmol
         obconversion.AddOption('I', obconversion.OUTOPTIONS)
         if obconversion.IsOption('i', obconversion.OUTOPTIONS) is None:
@@ -182,8 +212,7 @@ def convertsmiles(smiles, obconversion=None, neutralize=True, filtertype='not in
         obconversion.RemoveOption('b', obconversion.GENOPTIONS)
 
     # handle isocyanides
-    isocyanide.Match(mol)
-    for match in isocyanide.GetUMapList():
+    for match in evaluationcontext.match(isocyanide, mol):
         # determine carbon and heteroatoms
         atom1 = mol.GetAtom(match[0])
         atom2 = mol.GetAtom(match[1])
@@ -200,8 +229,7 @@ def convertsmiles(smiles, obconversion=None, neutralize=True, filtertype='not in
         bond.SetBondOrder(2)
 
     # handle azides
-    azide.Match(mol)
-    for match in azide.GetUMapList():
+    for match in evaluationcontext.match(azide, mol):
         # determine negative and positive charged atoms
         atom1 = mol.GetAtom(match[0])
         atom2 = mol.GetAtom(match[1])
@@ -228,21 +256,22 @@ def convertsmiles(smiles, obconversion=None, neutralize=True, filtertype='not in
     mol.DoTransformations(obconversion.GetOptions(obconversion.GENOPTIONS), obconversion)
 
     # get lists of charged atoms
-    chargedsmarts.Match(mol)
-    anychargeatoms = list(chargedsmarts.GetUMapList())
+    anychargeatoms = list(evaluationcontext.match(chargedsmarts, mol))
 
     # neutralize the structure and see if anything changed
     molcopy = ob.OBMol(mol)
     obconversion.AddOption('neutralize', obconversion.GENOPTIONS)
     molcopy.DoTransformations(obconversion.GetOptions(obconversion.GENOPTIONS), obconversion)
     obconversion.RemoveOption('neutralize', obconversion.GENOPTIONS)
-    chargedsmarts.Match(molcopy)
-    newanychargeatoms = list(chargedsmarts.GetUMapList())
+    newanychargeatoms = list(evaluationcontext.match(chargedsmarts, molcopy))
     if not neutralize and len(newanychargeatoms) < len(anychargeatoms):
         changes.append('structure contains neutralizable atoms')
     elif neutralize and len(newanychargeatoms) < len(anychargeatoms):
         changes.append('charged atoms neutralized')
-        mol = molcopy
+        # repeat the neutralization on mol itself so that it stays an IFSMol
+        obconversion.AddOption('neutralize', obconversion.GENOPTIONS)
+        mol.DoTransformations(obconversion.GetOptions(obconversion.GENOPTIONS), obconversion)
+        obconversion.RemoveOption('neutralize', obconversion.GENOPTIONS)
 
     if len(newanychargeatoms) > 0 and not neutralize:
         changes.append('structure contains permanently charged atoms')
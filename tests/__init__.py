@@ -0,0 +1,7 @@
+"""
+ifsqsar/tests subpackage
+developed by Trevor N. Brown
+Behaviour tests of the model API, run from the directory that contains the ifsqsar package with:
+
+python -m unittest discover -s ifsqsar/tests -t .
+"""
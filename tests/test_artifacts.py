@@ -0,0 +1,52 @@
+"""
+ifsqsar/tests/test_artifacts.py
+developed by Trevor N. Brown
+Checks that binary artifacts of model modules hold the module data and are not used once the module source changes
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from ifsqsar import models
+
+
+class TestArtifacts(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.artifact_directory = models._artifact_directory
+        models.set_artifact_directory(self.directory)
+        self.qsar = models.hhlb
+        self.qsar.load()
+
+    def tearDown(self):
+        models.set_artifact_directory(self.artifact_directory)
+        shutil.rmtree(self.directory)
+
+    def test_artifacts_hold_module_data(self):
+        self.assertEqual(models.build_model_artifacts([self.qsar, models.densityliquid]), ['hhlb'])
+        path, manifest = models._current_artifacts(self.qsar.model_module)
+        self.assertEqual(path, os.path.join(self.directory, 'ifs_qsar_hhlb_linr'))
+        self.assertIn('coefficientarrays', manifest['arrays'])
+        np.testing.assert_array_equal(np.load(os.path.join(path, 'coefficientarrays.npy')),
+                                      self.qsar.model_namespace.coefficientarrays)
+        with open(os.path.join(path, 'metadata.py'), 'r') as metadatafile:
+            self.assertNotIn('coefficientarrays =', metadatafile.read())
+
+    def test_edited_source_is_not_used(self):
+        models.build_model_artifacts([self.qsar])
+        with mock.patch.object(models, '_source_sha256', return_value='edited'):
+            self.assertEqual(models._current_artifacts(self.qsar.model_module), (None, None))
+        self.assertIsNotNone(models._current_artifacts(self.qsar.model_module)[0])
+
+    def test_incomplete_artifacts_are_not_used(self):
+        models.build_model_artifacts([self.qsar])
+        os.remove(os.path.join(self.directory, 'ifs_qsar_hhlb_linr', 'manifest.json'))
+        self.assertEqual(models._current_artifacts(self.qsar.model_module), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+ifsqsar/tests/test_batch.py
+developed by Trevor N. Brown
+Checks the calculate and calculate_many functions of the Meta QSARs against results recorded from the scalar calculate functions
+"""
+
+import json
+import os
+import unittest
+import importlib
+import numpy as np
+
+# Meta QSAR modules with a calculate_many function
+batch_modules = ['meta_qsar_logkow_pplfer', 'meta_qsar_logkowdry_pplfer', 'meta_qsar_logkoa_pplfer',
+                 'meta_qsar_logkaw_pplfer', 'meta_qsar_logkowod_pplfer', 'meta_qsar_logSo_liquid',
+                 'meta_qsar_logSowet_liquid', 'meta_qsar_tm_consensus', 'meta_qsar_hlbiodeg',
+                 'meta_qsar_MV_liquid', 'meta_qsar_MV_solid', 'meta_qsar_density_liquid', 'meta_qsar_density_solid']
+
+# dependency values, ULs, errors and propagated notes with the prediction, UL, error and notes
+# that the scalar calculate functions gave before calculate_many was added
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'meta_calculate_results.json'), 'r') as resultsfile:
+    recorded = json.load(resultsfile)
+
+
+def same(a, b):
+    """Compare two results, nan is the same as nan"""
+    if type(a) is str or type(b) is str:
+        return a == b
+    return (np.isnan(a) and np.isnan(b)) or a == b
+
+
+class TestCalculateMany(unittest.TestCase):
+
+    def test_calculate_matches_recorded(self):
+        for name in batch_modules:
+            module = importlib.import_module('ifsqsar.models.' + name)
+            for i, case in enumerate(recorded[name]):
+                # dependency values are numpy floats, like the predictions of QSARs
+                dependencies = dict((d, (np.float64(v[0]), v[1], np.float64(v[2]))) for d, v in case['dependencies'].items())
+                single = module.calculate([dependencies], [], [], [('u', '1')], [], [], propagated_domain_notes=case['notes'])
+                for r in range(4):
+                    self.assertTrue(same(single[r], case['expected'][r]),
+                                    '{} case {} result {}: {!r} != {!r}'.format(name, i, r, single[r], case['expected'][r]))
+
+    def test_calculate_many_matches_recorded(self):
+        for name in batch_modules:
+            module = importlib.import_module('ifsqsar.models.' + name)
+            cases = recorded[name]
+            columns = {}
+            for d in module.solute_dependencies_list:
+                uls = np.empty(len(cases), dtype=object)
+                uls[:] = [case['dependencies'][d][1] for case in cases]
+                columns[d] = (np.array([case['dependencies'][d][0] for case in cases]), uls,
+                              np.array([case['dependencies'][d][2] for case in cases]))
+            notes = np.array([case['notes'] for case in cases], dtype=object)
+            many = module.calculate_many(columns, propagated_domain_notes=notes)
+            for i, case in enumerate(cases):
+                for r in range(4):
+                    self.assertTrue(same(many[r][i], case['expected'][r]),
+                                    '{} case {} result {}: {!r} != {!r}'.format(name, i, r, many[r][i], case['expected'][r]))
+            self.assertEqual(many[4:], (module.citation, module.units, module.endpoint))
+
+    def test_tm_consensus_without_ul(self):
+        # the scalar calculate raised for a melting point without a numeric UL, so calculate_many does too
+        tmconsensus = importlib.import_module('ifsqsar.models.meta_qsar_tm_consensus')
+        with self.assertRaises(ValueError):
+            tmconsensus.calculate([{'tm': (300., np.nan, 20.), 'tmpplfer': (320., 2, 15.)}], [], [], [], [], [])
+        with self.assertRaises(ValueError):
+            tmconsensus.calculate_many({'tm': (np.array([300., 310.]), np.array([1, np.nan], dtype=object), np.array([20., 20.])),
+                                        'tmpplfer': (np.array([320., 320.]), np.array([2, 2], dtype=object), np.array([15., 15.]))})
+
+    def test_known_results(self):
+        # results of the scalar calculate functions before calculate_many was added
+        dependencies = {'S': (0.9, 1, 0.05), 'A': (0.3, 'E', 0.02), 'B': (0.6, 4, 0.04), 'V': (1.2, 0, 0.0),
+                        'L': (5.1, 2, 0.1), 'MVliquid': (150., np.nan, 0.)}
+        logkow = importlib.import_module('ifsqsar.models.meta_qsar_logkow_pplfer')
+        self.assertEqual(logkow.calculate([dependencies], [], [], [], [], [])[:4],
+                         (2.04, 'E2', 0.23, ', experimental, predicted values, aggregate solute descriptor UL is out of the AD'))
+        logso = importlib.import_module('ifsqsar.models.meta_qsar_logSo_liquid')
+        self.assertEqual(logso.calculate([dependencies], [], [], [], [], [])[:4],
+                         (0.45, 'E2', 0.52, '; experimental, predicted values, aggregate solute descriptor UL is out of the AD'))
+        tmconsensus = importlib.import_module('ifsqsar.models.meta_qsar_tm_consensus')
+        self.assertEqual(tmconsensus.calculate([{'tm': (300., 1, 20.), 'tmpplfer': (320., 4, 15.)}], [], [], [], [], [])[:4],
+                         (310.0, 2, 12.5, ''))
+        self.assertEqual(tmconsensus.calculate([{'tm': (300., 1, 20.), 'tmpplfer': (320., 'E2', 15.)}], [], [], [], [], [])[:4],
+                         (320.0, 'E2', 15.0, ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
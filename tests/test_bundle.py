@@ -0,0 +1,60 @@
+"""
+ifsqsar/tests/test_bundle.py
+developed by Trevor N. Brown
+Checks that the model bundle is checked against its content hash and the model module sources
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from ifsqsar import models
+
+
+class TestBundle(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.artifact_directory = models._artifact_directory
+        models.set_artifact_directory(self.directory)
+        self.qsarlist = [models.hhlb, models.MW, models.densityliquid]
+        models.build_model_bundle(self.qsarlist)
+
+    def tearDown(self):
+        models.set_artifact_directory(self.artifact_directory)
+        shutil.rmtree(self.directory)
+
+    def test_current_bundle(self):
+        self.assertEqual(models.check_model_bundle(), [])
+        self.assertTrue(models._bundle_current(models.hhlb.model_module))
+        self.assertFalse(models._bundle_current(models.fhlb.model_module))
+        arrays, manifest = models._get_bundle()
+        np.testing.assert_array_equal(arrays[models.hhlb.model_module + '/coefficientarray'],
+                                      models.hhlb.model_namespace.coefficientarray)
+
+    def test_edited_source_is_stale(self):
+        sourcehash = models._source_sha256
+        edited = models.hhlb.model_module
+        with mock.patch.object(models, '_source_sha256',
+                               side_effect=lambda model_module: 'edited' if model_module == edited else sourcehash(model_module)):
+            self.assertEqual(models.check_model_bundle(), [edited])
+            self.assertFalse(models._bundle_current(edited))
+            self.assertTrue(models._bundle_current(models.MW.model_module))
+
+    def test_changed_content_is_rejected(self):
+        path = os.path.join(self.directory, models._bundle_filename)
+        with np.load(path) as bundlefile:
+            arrays = dict(bundlefile)
+        arrays[models.hhlb.model_module + '/coefficientarray'] = arrays[models.hhlb.model_module + '/coefficientarray'] + 1
+        np.savez(path, **arrays)
+        with self.assertRaises(RuntimeError):
+            models.check_model_bundle()
+        os.remove(path)
+        with self.assertRaises(RuntimeError):
+            models.check_model_bundle()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+ifsqsar/tests/test_cli.py
+developed by Trevor N. Brown
+Checks that the command line interface only imports openbabel, numpy and the models when they are needed
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+import ifsqsar
+
+# run the CLI in this interpreter then list the heavy modules it imported
+run_cli = '''
+import runpy, sys
+sys.argv = ['ifsqsar'] + sys.argv[1:]
+try:
+    runpy.run_module('ifsqsar', run_name='__main__')
+except SystemExit:
+    pass
+print(','.join(module for module in ('openbabel', 'numpy', 'ifsqsar.models', 'ifsqsar.ifsqsar') if module in sys.modules))
+'''
+
+
+class TestCLI(unittest.TestCase):
+
+    def cli(self, *args):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.path.dirname(os.path.dirname(os.path.abspath(ifsqsar.__file__)))
+        result = subprocess.run([sys.executable, '-W', 'ignore', '-c', run_cli] + list(args), env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        return result.stdout.splitlines()
+
+    def test_help(self):
+        self.assertEqual(self.cli('--help')[-1], '')
+
+    def test_docs(self):
+        lines = self.cli('--docs')
+        self.assertIn('IFSQSAR', lines[1])
+        self.assertEqual(lines[-1], '')
+
+    def test_smiles(self):
+        lines = self.cli('-s', 'CCCCCCO', '-q', 'hhlb', '-v', 'normsmi,qsarpred')
+        self.assertEqual(lines[0].split('\t'), ['normsmi', 'hhlb qsarpred'])
+        self.assertEqual(lines[1].split('\t')[0], 'CCCCCCO')
+        self.assertEqual(set(lines[-1].split(',')), {'openbabel', 'numpy', 'ifsqsar.models', 'ifsqsar.ifsqsar'})
+
+
+if __name__ == '__main__':
+    unittest.main()
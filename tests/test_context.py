@@ -0,0 +1,69 @@
+"""
+ifsqsar/tests/test_context.py
+developed by Trevor N. Brown
+Checks that each thread matches its own copies of the shared SMARTS patterns
+"""
+
+import sys
+import threading
+import unittest
+from ifsqsar import context
+from ifsqsar import models
+from ifsqsar import smiles_norm
+
+
+class TestContext(unittest.TestCase):
+
+    def in_thread(self, function):
+        """Run a function in a new thread and return its result"""
+        results = []
+        thread = threading.Thread(target=lambda: results.append(function()))
+        thread.start()
+        thread.join()
+        return results[0]
+
+    def test_contexts_of_threads(self):
+        self.assertTrue(context.get_context().shared)
+        self.assertIs(context.get_context(), context.get_context())
+        threadcontext = self.in_thread(context.get_context)
+        self.assertFalse(threadcontext.shared)
+        self.assertIsNot(threadcontext, context.get_context())
+        self.assertIsNot(self.in_thread(context.get_context), threadcontext)
+
+    def test_patterns_are_copied(self):
+        pattern = models._get_smarts_pattern('[CX4]')
+        molecule = smiles_norm.convertsmiles('CCCCCCO')[0].get_hydrogen_view(False)
+        threadcontext = context.EvaluationContext()
+        matches = threadcontext.match(pattern, molecule)
+        self.assertEqual(len(matches), 6)
+        self.assertIsNot(threadcontext.patterns[pattern], pattern)
+        self.assertEqual(matches, context.EvaluationContext(shared=True).match(pattern, molecule))
+
+    def test_threads_match_at_once(self):
+        pattern = models._get_smarts_pattern('[CX4]')
+        smileslist = ['C' * n for n in range(1, 9)]
+        molecules = [smiles_norm.convertsmiles(smiles)[0].get_hydrogen_view(False) for smiles in smileslist]
+        barrier = threading.Barrier(len(molecules))
+        counts = [None] * len(molecules)
+
+        def count(i):
+            evaluationcontext = context.get_context()
+            barrier.wait()
+            counts[i] = [len(evaluationcontext.match(pattern, molecules[i])) for repeat in range(1000)]
+
+        # switch threads as often as possible so that matches of different threads interleave
+        switchinterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=count, args=(i,)) for i in range(len(molecules))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switchinterval)
+        self.assertEqual(counts, [[n] * 1000 for n in range(1, 9)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+"""
+ifsqsar/tests/test_count_matrix.py
+developed by Trevor N. Brown
+Checks that the fragment count matrix of a list of chemicals holds the fragment counts of each chemical
+"""
+
+import unittest
+import numpy as np
+from ifsqsar import models
+from ifsqsar import smiles_norm
+
+smileslist = ['CCCCCCO', 'c1ccccc1Cl', 'CC(=O)OC', 'CC1CCC(C(C1)O)C(C)C', 'xx', 'ClC(Cl)(Cl)C(Cl)(Cl)Cl',
+              'O=C(O)c1ccccc1O', 'CCCCCCCCCCCCCCCC', 'C', 'FC(F)(F)C(F)(F)C(F)(F)C(F)(F)S(=O)(=O)O']
+
+
+class TestCountMatrix(unittest.TestCase):
+
+    def test_rows_match_fragment_counts(self):
+        for qsar in [models.hhlb, models.tm, models.biowin3usmmlrx, models.biowin3usmmlra]:
+            counts_matrix = models.get_fragment_count_matrix(qsar, smileslist)
+            self.assertEqual(counts_matrix.shape, (len(smileslist), len(qsar.model_namespace.smartslist)))
+            for smiles, counts in zip(smileslist, counts_matrix):
+                molecule, normsmiles, conversionnote = smiles_norm.convertsmiles(smiles)
+                if normsmiles == '':
+                    # SMILES that could not be normalized
+                    self.assertTrue(np.isnan(counts).all())
+                else:
+                    np.testing.assert_array_equal(counts, qsar.get_fragment_counts(molecule))
+
+    def test_molecules(self):
+        molecules = [smiles_norm.convertsmiles(smiles)[0] for smiles in smileslist[:4]]
+        np.testing.assert_array_equal(models.get_fragment_count_matrix(models.hhlb, molecules),
+                                      models.get_fragment_count_matrix(models.hhlb, smileslist[:4]))
+
+
+if __name__ == '__main__':
+    unittest.main()
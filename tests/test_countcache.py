@@ -0,0 +1,80 @@
+"""
+ifsqsar/tests/test_countcache.py
+developed by Trevor N. Brown
+Checks that the persistent fragment count cache round trips counts and does not return stale counts
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import numpy as np
+from ifsqsar import models
+from ifsqsar import smiles_norm
+
+
+class TestCountCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'ifsqsar_fragment_counts.sqlite')
+        self.molecule = smiles_norm.convertsmiles('CCCCCCO')[0]
+
+    def tearDown(self):
+        models.set_fragment_count_cache(None)
+        shutil.rmtree(self.directory)
+
+    def qsar(self):
+        return models.get_qsar_list(['hhlb'])[0]
+
+    def tamper(self, value):
+        """Overwrite all the cached counts with value"""
+        models.set_fragment_count_cache(None)
+        with sqlite3.connect(self.path) as connection:
+            for dtype, counts, rowid in connection.execute('SELECT dtype, counts, rowid FROM fragment_counts').fetchall():
+                counts = np.full_like(np.frombuffer(counts, dtype=dtype), value)
+                connection.execute('UPDATE fragment_counts SET counts = ? WHERE rowid = ?', (counts.tobytes(), rowid))
+        models.set_fragment_count_cache(self.directory)
+
+    def test_round_trip(self):
+        expected = self.qsar().get_fragment_counts(self.molecule)
+        models.set_fragment_count_cache(self.directory)
+        first = self.qsar().get_fragment_counts(self.molecule)
+        models.set_fragment_count_cache(None)
+        models.set_fragment_count_cache(self.directory)
+        second = self.qsar().get_fragment_counts(self.molecule)
+        np.testing.assert_array_equal(first, expected)
+        np.testing.assert_array_equal(second, expected)
+        self.assertEqual(second.dtype, expected.dtype)
+        # counts really are read from the cache
+        self.tamper(7)
+        self.assertTrue((self.qsar().get_fragment_counts(self.molecule) == 7).all())
+
+    def test_edited_source_is_not_reused(self):
+        models.set_fragment_count_cache(self.directory)
+        expected = self.qsar().get_fragment_counts(self.molecule)
+        self.tamper(7)
+        # the same model version with another source hash, as after editing its fragments
+        qsar = self.qsar()
+        qsar.source_sha256 = 'edited'
+        np.testing.assert_array_equal(qsar.get_fragment_counts(self.molecule), expected)
+
+    def test_old_cache_is_dropped(self):
+        with sqlite3.connect(self.path) as connection:
+            connection.execute('CREATE TABLE fragment_counts (model_module TEXT, version INTEGER, normsmiles TEXT, '
+                               'dtype TEXT, counts BLOB, PRIMARY KEY (model_module, version, normsmiles))')
+        models.set_fragment_count_cache(self.directory)
+        expected = self.qsar().get_fragment_counts(self.molecule)
+        models.set_fragment_count_cache(None)
+        with sqlite3.connect(self.path) as connection:
+            columns = [column[1] for column in connection.execute('PRAGMA table_info(fragment_counts)')]
+            rows = connection.execute('SELECT source_sha256 FROM fragment_counts').fetchall()
+        self.assertIn('source_sha256', columns)
+        self.assertEqual(len(rows), 1)
+        self.assertNotEqual(rows[0][0], '')
+        self.assertEqual(len(expected), len(self.qsar().get_fragment_counts(self.molecule)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+ifsqsar/tests/test_domain.py
+developed by Trevor N. Brown
+Checks the CSS, leverage and UL of QSARs against results recorded from the original applicability domain calculation
+"""
+
+import json
+import os
+import unittest
+import numpy as np
+from ifsqsar import models
+from ifsqsar import smiles_norm
+
+# CSS, leverage, UL and notes recorded from the loop over the training set and the inverse of X'X,
+# with the chemicals whose top five fragment similarities are tied with the sixth and those without fragment overlap
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'domain_results.json'), 'r') as resultsfile:
+    recorded = json.load(resultsfile)
+
+
+class TestDomain(unittest.TestCase):
+
+    def setUp(self):
+        # apply the QSARs without any cached predictions, cached domain results or stored values
+        models.set_prediction_cache_size(0)
+        self.stored = {}
+        for name in recorded:
+            qsar = getattr(models, name)
+            qsar.load()
+            qsar.domain_cache.clear()
+            self.stored[name] = qsar.model_namespace.stored
+            qsar.model_namespace.stored = {}
+
+    def tearDown(self):
+        for name in recorded:
+            qsar = getattr(models, name)
+            qsar.domain_cache.clear()
+            qsar.model_namespace.stored = self.stored[name]
+        models.set_prediction_cache_size(65536)
+
+    def test_recorded_cases(self):
+        for name, results in recorded.items():
+            self.assertTrue(any(result['top5_tie'] for result in results), name)
+            self.assertTrue(any(result['no_overlap'] for result in results), name)
+
+    def test_domain_matches_recorded(self):
+        for name, results in recorded.items():
+            qsar = getattr(models, name)
+            for result in results:
+                molecule = smiles_norm.convertsmiles(result['smiles'])[0]
+                prediction, ul, error, note = qsar.apply_model(solutes=(molecule,), solutef=(None,))[:4]
+                css, leverage = qsar.domain_cache[qsar.get_fragment_counts(molecule).tobytes()][:2]
+                message = '{} {}'.format(name, result['smiles'])
+                self.assertTrue(np.isclose(css, result['css'], rtol=1e-12, atol=0), message)
+                self.assertTrue(np.isclose(leverage, result['leverage'], rtol=1e-8, atol=1e-12), message)
+                self.assertEqual(ul, result['UL'], message)
+                self.assertEqual(note, result['ULnote'], message)
+
+
+if __name__ == '__main__':
+    unittest.main()
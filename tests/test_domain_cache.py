@@ -0,0 +1,55 @@
+"""
+ifsqsar/tests/test_domain_cache.py
+developed by Trevor N. Brown
+Checks the least recently used cache of applicability domain results of a QSAR
+"""
+
+import unittest
+from ifsqsar import models
+from ifsqsar import smiles_norm
+
+
+class TestDomainCache(unittest.TestCase):
+
+    def setUp(self):
+        self.qsar = models.hhlb
+        self.qsar.load()
+        self.molecules = [smiles_norm.convertsmiles(smiles)[0] for smiles in ['CCCCCCO', 'c1ccccc1Cl', 'CC(=O)OC']]
+        self.size = self.qsar.domain_cache_size
+        self.qsar.domain_cache_size = 2
+        self.qsar.domain_cache.clear()
+        # apply the QSAR without any cached predictions or stored values
+        models.set_prediction_cache_size(0)
+        self.stored = self.qsar.model_namespace.stored
+        self.qsar.model_namespace.stored = {}
+
+    def tearDown(self):
+        self.qsar.domain_cache_size = self.size
+        self.qsar.domain_cache.clear()
+        self.qsar.model_namespace.stored = self.stored
+        models.set_prediction_cache_size(65536)
+
+    def apply(self, molecule):
+        return tuple(self.qsar.apply_model(solutes=(molecule,), solutef=(None,)))
+
+    def key(self, molecule):
+        return self.qsar.get_fragment_counts(molecule).tobytes()
+
+    def test_least_recently_used_is_evicted(self):
+        first, second, third = self.molecules
+        uncached = [self.apply(molecule) for molecule in self.molecules]
+        self.assertEqual(list(self.qsar.domain_cache), [self.key(second), self.key(third)])
+        self.assertEqual(self.apply(second), uncached[1])
+        self.assertEqual(self.apply(first), uncached[0])
+        self.assertEqual(list(self.qsar.domain_cache), [self.key(second), self.key(first)])
+
+    def test_cached_results_match(self):
+        uncached = [self.apply(molecule) for molecule in self.molecules]
+        self.qsar.domain_cache_size = 4096
+        for molecule in self.molecules:
+            self.apply(molecule)
+        self.assertEqual([self.apply(molecule) for molecule in self.molecules], uncached)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+"""
+ifsqsar/tests/test_fragments.py
+developed by Trevor N. Brown
+Checks that the SMARTS matches remembered by each molecule are not changed by matching other molecules
+"""
+
+import unittest
+import numpy as np
+from ifsqsar import models
+from ifsqsar import smiles_norm
+
+
+class TestRememberedMatches(unittest.TestCase):
+
+    def test_counts_do_not_change(self):
+        smileslist = ['CCCCCCO', 'c1ccccc1Cl', 'OCCO', 'CC(=O)OC']
+        for qsar in [models.hhlb, models.biowin3usmmlrx, models.biowin3usmmlra, models.MVmlrx]:
+            molecules = [smiles_norm.convertsmiles(smiles)[0] for smiles in smileslist]
+            first = [qsar.get_fragment_counts(molecule) for molecule in molecules]
+            second = [qsar.get_fragment_counts(molecule) for molecule in molecules]
+            fresh = [qsar.get_fragment_counts(smiles_norm.convertsmiles(smiles)[0]) for smiles in smileslist]
+            for counts, again, new in zip(first, second, fresh):
+                np.testing.assert_array_equal(again, counts)
+                np.testing.assert_array_equal(new, counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+ifsqsar/tests/test_plan.py
+developed by Trevor N. Brown
+Checks the order of the EvaluationPlan of a list of QSARs, its use of stored values and the cache of plans
+"""
+
+import unittest
+from unittest import mock
+from ifsqsar import models
+from ifsqsar import smiles_norm
+
+
+class TestEvaluationPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.molecule = smiles_norm.convertsmiles('CCCCCCO')[0]
+
+    def apply(self, qsarlist):
+        plan = models.EvaluationPlan(qsarlist)
+        return plan.apply(solutes=(self.molecule,), solutef=(None,))
+
+    def test_dependencies_come_first(self):
+        plan = models.EvaluationPlan([models.densityliquid, models.MW, models.HLbiodeg])
+        order = [str(qsar) for qsar in plan.order]
+        self.assertEqual(len(order), len(set(order)))
+        self.assertEqual(order.index('densityliquid'), max(order.index('MVliquid'), order.index('MW')) + 1)
+        for dependency in ['biowin3usmmlrx', 'biowin3usmmlra', 'biowin4psmmlrx', 'biowin4psmmlra']:
+            self.assertLess(order.index(dependency), order.index('HLbiodeg'))
+        self.assertEqual(set(str(qsar) for qsar in plan.dependencies),
+                         {'MVliquid', 'MW', 'biowin3usmmlrx', 'biowin3usmmlra', 'biowin4psmmlrx', 'biowin4psmmlra'})
+
+    def test_matches_apply_model(self):
+        results = self.apply([models.densityliquid, models.HLbiodeg, models.MW])
+        for qsar in [models.densityliquid, models.HLbiodeg, models.MW]:
+            self.assertEqual(results[qsar], tuple(qsar.apply_model(solutes=(self.molecule,), solutef=(None,))))
+
+    def test_stored_value_of_dependency(self):
+        predicted = self.apply([models.densityliquid])[models.densityliquid]
+        models.MW.set_stored(self.molecule.normsmiles, 2 * models.MW.apply_model(solutes=(self.molecule,), solutef=(None,))[0])
+        # the Meta QSAR keeps its earlier prediction until it is removed
+        models.densityliquid.remove_stored(self.molecule.normsmiles)
+        try:
+            results = self.apply([models.densityliquid, models.MW])
+        finally:
+            models.MW.remove_stored(self.molecule.normsmiles)
+            models.densityliquid.remove_stored(self.molecule.normsmiles)
+        self.assertEqual(results[models.MW][1], 'U')
+        # densities are rounded to 3 digits
+        self.assertAlmostEqual(results[models.densityliquid][0], 2 * predicted[0], delta=0.002)
+        self.assertEqual(self.apply([models.densityliquid])[models.densityliquid], predicted)
+
+
+class TestPlanCache(unittest.TestCase):
+
+    def test_least_recently_used_is_evicted(self):
+        with mock.patch.object(models, '_evaluation_plans', type(models._evaluation_plans)()), \
+                mock.patch.object(models, '_evaluation_plans_size', 2):
+            first = models.get_evaluation_plan([models.MW])
+            second = models.get_evaluation_plan([models.MVliquid])
+            self.assertIs(models.get_evaluation_plan([models.MW]), first)
+            models.get_evaluation_plan([models.densityliquid])
+            self.assertEqual(len(models._evaluation_plans), 2)
+            self.assertIs(models.get_evaluation_plan([models.MW]), first)
+            self.assertIsNot(models.get_evaluation_plan([models.MVliquid]), second)
+
+
+if __name__ == '__main__':
+    unittest.main()
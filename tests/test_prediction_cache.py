@@ -0,0 +1,63 @@
+"""
+ifsqsar/tests/test_prediction_cache.py
+developed by Trevor N. Brown
+Checks the least recently used cache of calculated predictions
+"""
+
+import unittest
+from ifsqsar import models
+from ifsqsar import smiles_norm
+
+
+class TestPredictionCache(unittest.TestCase):
+
+    def test_least_recently_used_is_evicted(self):
+        cache = models.PredictionCache(2)
+        cache.put('a', 'C', (1,))
+        cache.put('a', 'CC', (2,))
+        self.assertEqual(cache.get('a', 'C'), (1,))
+        cache.put('a', 'CCC', (3,))
+        self.assertIsNone(cache.get('a', 'CC'))
+        self.assertEqual(cache.get('a', 'C'), (1,))
+        self.assertEqual(cache.get('a', 'CCC'), (3,))
+        self.assertEqual(cache.stats(), {'capacity': 2, 'size': 2, 'hits': 3, 'misses': 1})
+
+    def test_resize(self):
+        cache = models.PredictionCache(3)
+        for i, smiles in enumerate(['C', 'CC', 'CCC']):
+            cache.put('a', smiles, (i,))
+        cache.resize(1)
+        self.assertEqual(list(cache.entries), [('a', 'CCC')])
+        cache.resize(0)
+        cache.put('a', 'C', (0,))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_remove(self):
+        cache = models.PredictionCache(10)
+        cache.put('a', 'C', (1, 'U'))
+        cache.put('a', 'CC', (2, 2))
+        cache.put('b', 'C', (3, 'U'))
+        cache.remove('a', ul='U')
+        self.assertEqual(set(cache.entries), {('a', 'CC'), ('b', 'C')})
+        cache.remove('b', normsmiles='C')
+        self.assertEqual(set(cache.entries), {('a', 'CC')})
+        cache.remove('a')
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_cached_prediction_is_returned(self):
+        molecule = smiles_norm.convertsmiles('CCCCCCO')[0]
+        # start without a cached or stored result for the molecule
+        models.MW.remove_stored(molecule.normsmiles)
+        self.addCleanup(models.MW.load_stored, molecule.normsmiles)
+        before = models.get_prediction_cache_stats()
+        first = models.MW.apply_model(solutes=(molecule,), solutef=(None,))
+        second = models.MW.apply_model(solutes=(molecule,), solutef=(None,))
+        after = models.get_prediction_cache_stats()
+        self.assertEqual(tuple(first), tuple(second))
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        with self.assertRaises(ValueError):
+            models.set_prediction_cache_size(-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
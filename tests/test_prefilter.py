@@ -0,0 +1,50 @@
+"""
+ifsqsar/tests/test_prefilter.py
+developed by Trevor N. Brown
+Checks that skipping SMARTS patterns a molecule does not have the atoms or ring for does not change any match count
+"""
+
+import importlib
+import unittest
+from ifsqsar import models
+from ifsqsar import smiles_norm
+
+smileslist = ['CCCCCCO', 'c1ccccc1Cl', 'CC(=O)OC', 'OCCO', 'ClC(Cl)(Cl)C(Cl)(Cl)Cl', 'O=C(O)c1ccccc1O', 'C1CC1',
+              'FC(F)(F)C(F)(F)C(F)(F)C(F)(F)S(=O)(=O)O', 'C[Si](C)(C)O[Si](C)(C)C', 'BrC(Br)(Br)C(Br)(Br)Br', 'IC',
+              'CCCCCCCCCCCCCCCCCCCC', 'CN(C)C=O', 'c1ccc2ccccc2c1', 'C', 'O', 'CC(=O)[O-]', 'Nc1ccc(cc1)S(=O)(=O)N']
+
+
+class TestPrefilter(unittest.TestCase):
+
+    def test_counts_match_unfiltered(self):
+        for qsar in models.get_qsar_list(['fhlb', 'hhlb', 'hhlt', 'HLbiodeg', 'dsm', 'MVliquid', 'MW',
+                                          'A', 'V', 's', 'a', 'b', 'v', 'l', 'c', 'tm']):
+            qsar.load()
+        # training set chemicals of models with different fragments
+        training = []
+        for model_module in ['ifs_qsar_hhlb_linr', 'ifs_qsar_ADB_UFZ__A_linr', 'ifs_qsar_tm_linr']:
+            datalist = importlib.import_module('ifsqsar.models.' + model_module).datalist
+            training.extend(smiles.decode() for smiles in datalist['smiles'][::100])
+        patterns = list(models._smarts_registry.values())
+        skipped = 0
+        for smiles in smileslist + training:
+            molecule, normsmiles, conversionnote = smiles_norm.convertsmiles(smiles)
+            if normsmiles == '':
+                continue
+            for explicith in (True, False):
+                view = molecule.get_hydrogen_view(explicith)
+                for pattern in patterns:
+                    prefiltered = len(models._match_smarts(pattern, molecule, explicith))
+                    pattern.Match(view)
+                    self.assertEqual(prefiltered, len(pattern.GetUMapList()), '{} {}'.format(smiles, explicith))
+                elementcounts, numrings = molecule.get_composition(explicith)
+                for pattern in patterns:
+                    elements, needsring = models._smarts_requirements[pattern]
+                    if (needsring and numrings == 0) or \
+                            any(elementcounts.get(atomicnum, 0) < count for atomicnum, count in elements.items()):
+                        skipped += 1
+        self.assertGreater(skipped, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+ifsqsar/tests/test_profiling.py
+developed by Trevor N. Brown
+Checks the recording of start up phases and the totals of the startup report
+"""
+
+import json
+import sys
+import unittest
+from ifsqsar import profiling
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.phases = list(profiling.phases)
+        del profiling.phases[:]
+
+    def tearDown(self):
+        profiling.phases[:] = self.phases
+
+    def test_nested_phases(self):
+        with profiling.phase('model load', 'outer'):
+            with profiling.phase('model load', 'inner'):
+                pass
+            with profiling.phase('domain', 'other'):
+                pass
+        inner, other, outer = profiling.phases
+        self.assertEqual((inner['name'], inner['parent']), ('inner', 'outer'))
+        self.assertEqual((other['name'], other['parent']), ('other', 'outer'))
+        self.assertEqual(outer['parent'], '')
+        report = profiling.startup_report()
+        # the inner phase is part of the outer phase of the same type so it is only counted once
+        self.assertEqual(report['totals']['model load'], outer['seconds'])
+        self.assertEqual(report['totals']['domain'], other['seconds'])
+        self.assertEqual(json.loads(profiling.write_startup_report()), report)
+
+    def test_import_phase(self):
+        with profiling.import_phase('json'):
+            pass
+        self.assertEqual(profiling.phases, [])
+        self.assertNotIn('ifsqsar_not_a_module', sys.modules)
+        with profiling.import_phase('ifsqsar_not_a_module'):
+            pass
+        self.assertEqual([(p['phase'], p['name']) for p in profiling.phases], [('import', 'ifsqsar_not_a_module')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+ifsqsar/tests/test_threads.py
+developed by Trevor N. Brown
+Checks that QSARs applied from a thread pool give the same results as applying them in one thread
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+import ifsqsar
+
+# QSARs and their dependencies are loaded by the threads, so this runs in a new interpreter
+cold_start = '''
+import concurrent.futures
+from ifsqsar import ifsqsar, models
+qsarlist = models.get_qsar_list(['fhlb', 'hhlb', 'hhlt', 'HLbiodeg', 'dsm', 'MVliquid', 'densityliquid', 'MW',
+                                 'A', 'V', 's', 'a', 'b', 'v', 'l', 'c'])
+smileslist = ['CCCCCCO', 'c1ccccc1Cl', 'CC(=O)OC', 'OCCO', 'ClC(Cl)(Cl)C(Cl)(Cl)Cl', 'O=C(O)c1ccccc1O',
+              'CCCCCCCCCCCCCCCC', 'CC1CCC(C(C1)O)C(C)C', 'FC(F)(F)C(F)(F)C(F)(F)C(F)(F)S(=O)(=O)O', 'C1CC1'] * 3
+models.set_prediction_cache_size(0)
+def apply(smiles):
+    return ifsqsar.apply_qsars_to_molecule(qsarlist, smiles, outformat='rows', header=False)
+with concurrent.futures.ThreadPoolExecutor(8) as threadpool:
+    threaded = list(threadpool.map(apply, smileslist))
+print('same' if threaded == [apply(smiles) for smiles in smileslist] else 'different')
+'''
+
+
+class TestThreads(unittest.TestCase):
+
+    def test_cold_start(self):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.path.dirname(os.path.dirname(os.path.abspath(ifsqsar.__file__)))
+        for run in range(2):
+            result = subprocess.run([sys.executable, '-W', 'ignore', '-c', cold_start], env=env,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+            self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+            self.assertEqual(result.stdout.strip().splitlines()[-1], 'same')
+
+
+if __name__ == '__main__':
+    unittest.main()
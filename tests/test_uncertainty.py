@@ -0,0 +1,65 @@
+"""
+ifsqsar/tests/test_uncertainty.py
+developed by Trevor N. Brown
+Checks the aggregation of uncertainty levels (ULs) by the Meta QSARs
+"""
+
+import unittest
+import numpy as np
+from ifsqsar.models import uncertainty
+
+
+class TestAggregate(unittest.TestCase):
+
+    def test_root_mean_square(self):
+        self.assertEqual(uncertainty.aggregate([1, 2]), (5 / 2)**0.5)
+        self.assertEqual(uncertainty.aggregate([1, 2], roundup=True), 2)
+        self.assertEqual(uncertainty.aggregate([0, 0, 0], roundup=True), 0)
+
+    def test_five_overrides(self):
+        self.assertEqual(uncertainty.aggregate([0, 5, 1]), 5)
+        self.assertEqual(uncertainty.aggregate(['U', 'E5', 0]), 'EU5')
+
+    def test_flags(self):
+        self.assertEqual(uncertainty.aggregate(['E', 2]), 'E2.0')
+        self.assertEqual(uncertainty.aggregate(['E', 'U', 2], roundup=True), 'EU2')
+        self.assertEqual(uncertainty.aggregate(['E', 'U']), 'EU')
+        self.assertEqual(uncertainty.aggregate(['E1.5811388300841898', 1]), 'E{}'.format(((2.5 + 1) / 2)**0.5))
+        self.assertIsNone(uncertainty.aggregate([]))
+
+    def test_nan_is_skipped(self):
+        self.assertEqual(uncertainty.aggregate([np.nan, 1, 3]), uncertainty.aggregate([1, 3]))
+        self.assertEqual(uncertainty.aggregate([np.nan, 'E', 2], roundup=True), 'E2')
+        self.assertIsNone(uncertainty.aggregate([np.nan, np.nan], roundup=True))
+
+    def test_descriptor_level(self):
+        self.assertEqual([uncertainty.descriptor_level(ul) for ul in [0, 3, 4, 5, 6, 'E']], [0, 3, 1, 5, 3, 'E'])
+        self.assertEqual(uncertainty.descriptor_level(4, four=2), 2)
+
+    def test_columns_match_aggregate(self):
+        rng = np.random.default_rng(0)
+        pool = np.array([0, 1, 2, 3, 5, 'E', 'U', 'EU', 'E2', 'U1', 'EU3', 'E5', np.nan, 1.4142135623730951], dtype=object)
+        columns = [rng.choice(pool, 500) for _ in range(4)]
+        encoded = [uncertainty.encode_column(column) for column in columns]
+        for roundup in (False, True):
+            levels, flags = uncertainty.aggregate_columns([e[0] for e in encoded], [e[1] for e in encoded], roundup=roundup)
+            aggregates = uncertainty.decode_column(levels, flags, roundup=roundup)
+            for i in range(500):
+                expected = uncertainty.aggregate([column[i] for column in columns], roundup=roundup)
+                self.assertEqual(aggregates[i], expected)
+                self.assertIs(type(aggregates[i]), type(expected))
+
+    def test_solute_descriptor_ul(self):
+        uls = {'S': [1, 'E', 'E', 5], 'A': [1, 'E', 2, 0], 'B': [4, 'U', 2, 0], 'L': [4, 'E', 2, 0]}
+        ulcolumn, notes, errorscale = uncertainty.solute_descriptor_ul(uls)
+        self.assertEqual(list(ulcolumn), [2, 'EU', 'E2', 5])
+        self.assertEqual(list(errorscale), [1.25, 1.25, 1.25, 1.25])
+        self.assertEqual(notes[0], 'aggregate solute descriptor UL is out of the AD')
+        self.assertEqual(notes[1], 'experimental or user values, aggregate solute descriptor UL is in the AD')
+        self.assertEqual(notes[2], 'experimental, predicted values, aggregate solute descriptor UL is out of the AD')
+        ulcolumn, notes, errorscale = uncertainty.solute_descriptor_ul({'S': ['E'], 'A': ['E'], 'B': ['E'], 'L': ['E']})
+        self.assertEqual((ulcolumn[0], errorscale[0]), ('E', 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+ifsqsar/tests/test_values.py
+developed by Trevor N. Brown
+Checks that requesting only predictions gives the same predictions as requesting all values
+"""
+
+import unittest
+import numpy as np
+from ifsqsar import ifsqsar
+from ifsqsar import models
+
+qsarnames = ['fhlb', 'hhlb', 'hhlt', 'HLbiodeg', 'dsm', 'MVliquid', 'densityliquid', 'MW', 'tm',
+             'A', 'V', 's', 'a', 'b', 'v', 'l', 'c']
+smileslist = ['CCCCCCO', 'c1ccccc1Cl', 'CC(=O)OC', 'OCCO', 'ClC(Cl)(Cl)C(Cl)(Cl)Cl', 'O=C(O)c1ccccc1O', 'C1CC1',
+              'CCCCCCCCCCCCCCCC', 'CC1CCC(C(C1)O)C(C)C', 'FC(F)(F)C(F)(F)C(F)(F)C(F)(F)S(=O)(=O)O', 'C', 'O',
+              'CCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCC', 'BrC(Br)(Br)C(Br)(Br)Br', 'xx', '{solute}CCO{solvent}CCCCCCCCO']
+
+
+def same(a, b):
+    """Compare two predictions, nan is the same as nan"""
+    if type(a) is str or type(b) is str:
+        return a == b
+    return (np.isnan(a) and np.isnan(b)) or a == b
+
+
+class TestValues(unittest.TestCase):
+
+    def setUp(self):
+        self.qsarlist = models.get_qsar_list(qsarnames)
+
+    def tearDown(self):
+        models.set_prediction_cache_size(65536)
+
+    def apply(self, values, outformat='dict'):
+        return ifsqsar.apply_qsars_to_molecule_list(self.qsarlist, smileslist=smileslist, values=values, outformat=outformat)
+
+    def compare(self, predictions, full):
+        for qsar in qsarnames:
+            for column in full[qsar]:
+                if column.startswith('qsarpred'):
+                    for prediction, fullprediction in zip(predictions[qsar][column], full[qsar][column]):
+                        self.assertTrue(same(prediction, fullprediction), '{} {}: {!r} != {!r}'.format(qsar, column, prediction, fullprediction))
+
+    def test_predictions_match(self):
+        for cachesize in (0, 65536):
+            models.set_prediction_cache_size(cachesize)
+            predictions = self.apply(('qsarpred',))
+            fullrows = self.apply(('qsarpred', 'UL', 'error', 'ULnote'), outformat='rows')
+            full = self.apply(('qsarpred', 'UL', 'error', 'ULnote'))
+            self.compare(predictions, full)
+            self.compare(self.apply(('qsarpred', 'citation')), full)
+            # the predictions without the applicability domain do not replace the complete results
+            self.apply(('qsarpred',))
+            self.assertEqual(fullrows, self.apply(('qsarpred', 'UL', 'error', 'ULnote'), outformat='rows'))
+            self.assertFalse(np.isnan(full['hhlb']['UL']).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
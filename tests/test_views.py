@@ -0,0 +1,56 @@
+"""
+ifsqsar/tests/test_views.py
+developed by Trevor N. Brown
+Checks that QSARs are applied to hydrogen views of a molecule and never change the molecule itself
+"""
+
+import unittest
+from ifsqsar import models
+from ifsqsar import smiles_norm
+
+smileslist = ['CCCCCCO', 'c1ccccc1Cl', 'CC(=O)OC', 'C[Si](C)(C)O[Si](C)(C)C', 'O=C(O)c1ccccc1O']
+
+
+class TestViews(unittest.TestCase):
+
+    def setUp(self):
+        # apply the QSARs without any cached predictions or stored values
+        models.set_prediction_cache_size(0)
+        self.qsarlist = [models.hhlb, models.fhlb, models.tm, models.dsm]
+        self.stored = []
+        for qsar in self.qsarlist:
+            qsar.load()
+            self.stored.append(qsar.model_namespace.stored)
+            qsar.model_namespace.stored = {}
+
+    def tearDown(self):
+        for qsar, stored in zip(self.qsarlist, self.stored):
+            qsar.model_namespace.stored = stored
+        models.set_prediction_cache_size(65536)
+
+    def test_molecule_is_not_changed(self):
+        for smiles in smileslist:
+            molecule = smiles_norm.convertsmiles(smiles)[0]
+            numatoms = molecule.NumAtoms()
+            results = []
+            # QSARs with explicit hydrogens (old format) and implicit hydrogens in turn, twice
+            for repeat in range(2):
+                results.append([tuple(qsar.apply_model(solutes=(molecule,), solutef=(None,))) for qsar in self.qsarlist])
+                self.assertEqual(molecule.NumAtoms(), numatoms)
+            self.assertEqual(results[0], results[1])
+            # the same results as a new molecule that is only used by each QSAR once
+            self.assertEqual(results[0], [tuple(qsar.apply_model(solutes=(smiles_norm.convertsmiles(smiles)[0],), solutef=(None,)))
+                                          for qsar in self.qsarlist])
+
+    def test_views(self):
+        molecule = smiles_norm.convertsmiles('CCCCCCO')[0]
+        explicit = molecule.get_hydrogen_view(True)
+        implicit = molecule.get_hydrogen_view(False)
+        self.assertIs(molecule.get_hydrogen_view(True), explicit)
+        self.assertEqual((explicit.NumAtoms(), implicit.NumAtoms()), (21, 7))
+        self.assertEqual(molecule.get_composition(True), ({1: 14, 6: 6, 8: 1}, 0))
+        self.assertEqual(molecule.get_composition(False), ({6: 6, 8: 1}, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+ifsqsar/tests/test_warmup.py
+developed by Trevor N. Brown
+Checks that warmup loads QSARs and their dependencies in the same order with any number of workers
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+import ifsqsar
+
+# the models are loaded by warmup, so this runs in a new interpreter
+cold_start = '''
+import json, sys
+from ifsqsar import ifsqsar, models
+qsarlist = models.get_qsar_list(['hhlb', 'densityliquid', 'HLbiodeg'])
+report = models.warmup(qsarlist, workers=int(sys.argv[1]))
+loaded = [entry['name'] for entry in report
+          if entry['name'] != 'openbabel' and models.get_qsar_list([entry['name']])[0].model_namespace is not None]
+domains = [qsar.model_name for qsar in (models.hhlb, models.biowin3usmmlrx) if qsar.domain_loaded]
+results = ifsqsar.apply_qsars_to_molecule_list(qsarlist, smileslist=['CCCCCCO', 'c1ccccc1Cl', 'OCCO'], outformat='rows')
+print(json.dumps({'report': [[entry['name'], entry['module']] for entry in report], 'loaded': loaded,
+                  'domains': domains, 'results': results}))
+'''
+
+
+class TestWarmup(unittest.TestCase):
+
+    def run_python(self, *args):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.path.dirname(os.path.dirname(os.path.abspath(ifsqsar.__file__)))
+        result = subprocess.run([sys.executable, '-W', 'ignore'] + list(args), env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        return result
+
+    def warmup(self, workers):
+        return json.loads(self.run_python('-c', cold_start, str(workers)).stdout.strip().splitlines()[-1])
+
+    def test_workers(self):
+        serial = self.warmup(1)
+        self.assertEqual(serial['report'][0], ['openbabel', 'openbabel'])
+        self.assertEqual([name for name, module in serial['report'][1:4]], ['hhlb', 'densityliquid', 'HLbiodeg'])
+        self.assertIn('MVliquid', serial['loaded'])
+        self.assertEqual(len(serial['loaded']), len(serial['report']) - 1)
+        self.assertEqual(serial['domains'], ['hhlb'])
+        self.assertEqual(self.warmup(2), serial)
+
+    def test_cli(self):
+        # without input the CLI only loads the models and prints the report to standard error
+        result = self.run_python('-m', 'ifsqsar', '-q', 'hhlb,MW', '-w')
+        self.assertEqual(result.stdout, '')
+        report = [line.split('\t') for line in result.stderr.splitlines() if line.count('\t') == 3]
+        self.assertEqual([entry[:2] for entry in report], [['openbabel', 'openbabel'],
+                                                           ['hhlb', 'ifsqsar.models.ifs_qsar_hhlb_linr'],
+                                                           ['MW', 'ifsqsar.models.other_qsar_MW']])
+        self.assertTrue(all(entry[2].endswith(' s') and entry[3].endswith(' bytes') for entry in report))
+
+
+if __name__ == '__main__':
+    unittest.main()